@@ -0,0 +1,92 @@
+# benchmarks/bench_export.py
+"""
+Bulk export benchmark: throughput and peak RSS of GET /api/export.
+
+Writes a synthetic events log (same line format as events.append_events)
+into a temp dir, then streams it through the Flask test client in every
+format, counting bytes without buffering the response.
+
+    python benchmarks/bench_export.py                  # 5M events
+    python benchmarks/bench_export.py --events 100000  # quick run
+
+Peak RSS is the process high-water mark (ru_maxrss) after each export; it
+should stay flat regardless of log size.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import events  # noqa: E402
+import server  # noqa: E402
+
+COMPETITORS = ["Plausible Analytics", "Ackee", "Cal.com", "Umami Analytics", "Directus"]
+CATEGORIES = ["feature", "pricing", "deprecation", "fix", "docs", "noise"]
+
+
+def _rss_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_log(path, n):
+    with open(path, "wb") as f:
+        for i in range(1, n + 1):
+            line = f"Added export format number {i}, with \"quoted\" options for the reports view"
+            ev = {"competitor": COMPETITORS[i % len(COMPETITORS)],
+                  "timestamp": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T00:00:00Z",
+                  "summary": line[:100], "changes": [line], "type": "update",
+                  "category": CATEGORIES[i % len(CATEGORIES)], "score": 0.5, "id": i}
+            f.write((json.dumps(ev, separators=(",", ":")) + "\n").encode("utf-8"))
+
+
+def export(client, query):
+    started = time.perf_counter()
+    resp = client.get(f"/api/export?{query}", buffered=False)
+    size = 0
+    for chunk in resp.response:
+        size += len(chunk)
+    resp.close()
+    return size, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=5_000_000)
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench-export-")
+    try:
+        events.EVENTS_PATH = os.path.join(tmp, "events.jsonl")
+        started = time.perf_counter()
+        write_log(events.EVENTS_PATH, args.events)
+        log_mb = os.path.getsize(events.EVENTS_PATH) / 1e6
+        print(f"log: {args.events} events, {log_mb:.0f} MB, written in {time.perf_counter() - started:.1f}s")
+        print(f"baseline peak RSS: {_rss_mb():.0f} MB")
+
+        client = server.app.test_client()
+        cases = [
+            ("ndjson", "format=ndjson"),
+            ("ndjson gzip", "format=ndjson&compress=gzip"),
+            ("csv", "format=csv"),
+            ("csv gzip", "format=csv&compress=gzip"),
+            ("filtered ndjson", "competitor=Ackee&type=feature&since=2024-06-01"),
+            ("resume last 10%", f"after={args.events * 9 // 10}"),
+        ]
+        for label, query in cases:
+            size, elapsed = export(client, query)
+            print(f"{label:<16} {size / 1e6:8.0f} MB out  {elapsed:7.1f}s  "
+                  f"{args.events / elapsed:>10,.0f} log events/s  peak RSS {_rss_mb():.0f} MB")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
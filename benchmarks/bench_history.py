@@ -0,0 +1,89 @@
+# benchmarks/bench_history.py
+"""
+History benchmark: disk use and random rebuild latency of history.py over
+many versions of one page.
+
+Records versions of a synthetic changelog page in a temp HISTORY_DIR. Each
+version adds a release at the top and edits a line or two further down, so
+deltas stay small. Compares the log size with storing every version in full,
+then rebuilds random versions with history.get_version.
+
+    python benchmarks/bench_history.py                       # 10k versions, 800 lines
+    python benchmarks/bench_history.py --versions 2000 --lines 300
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history  # noqa: E402
+
+KEY = "Bench"
+
+
+def _versions(n, lines, seed=1):
+    rng = random.Random(seed)
+    page = [f"<li>Release {i}: added export format {i} and fixed dashboard crash {i}</li>"
+            for i in range(lines, 0, -1)]
+    for v in range(n):
+        page = [f"<li>Release {lines + v + 1}: added export format {v} and a new API</li>"] + page[:-1]
+        for _ in range(rng.randint(0, 2)):
+            i = rng.randrange(len(page))
+            page[i] = page[i].replace("</li>", f" (edited in {v})</li>")
+        yield page
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--versions", type=int, default=10_000)
+    parser.add_argument("--lines", type=int, default=800)
+    parser.add_argument("--samples", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench-history-")
+    try:
+        history.HISTORY_DIR = tmp
+        history._index.clear()
+
+        naive = 0
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        started = time.perf_counter()
+        for i, page in enumerate(_versions(args.versions, args.lines)):
+            history.record_version(KEY, page, timestamp=(start + timedelta(hours=i)).isoformat())
+            naive += len("\n".join(page).encode())
+        print(f"record: {args.versions} versions of {args.lines} lines in "
+              f"{time.perf_counter() - started:.1f}s")
+
+        on_disk = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+        print(f"disk: {on_disk / 1e6:.1f} MB, naive {naive / 1e6:.0f} MB ({naive / on_disk:.0f}x smaller)")
+
+        history._index.clear()
+        history.list_versions(KEY)  # load the index once, as a long-running server would
+        rng = random.Random(2)
+        samples = []
+        for _ in range(args.samples):
+            v = rng.randrange(args.versions)
+            t0 = time.perf_counter()
+            history.get_version(KEY, v)
+            samples.append((time.perf_counter() - t0) * 1000)
+        print(f"rebuild: p50 {statistics.median(samples):.1f} ms, p99 {_percentile(samples, 99):.1f} ms "
+              f"over {args.samples} random versions")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_replay.py
+"""
+Replay benchmark: pages/sec and peak RSS of `main.py replay` over a synthetic
+raw-page archive.
+
+Builds an archive in a temp dir (per-run folders, as main.run writes with
+ARCHIVE_RAW_PAGES=1). Some competitors are paginated, so their runs are
+replayed on merged state; each run adds one release and every fifth run of a
+paginated competitor re-crawls page two. Then runs replay.replay(dry_run=True).
+
+    python benchmarks/bench_replay.py                        # 1M pages
+    python benchmarks/bench_replay.py --pages 20000 --workers 4
+"""
+
+import argparse
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+import replay  # noqa: E402
+
+PER_PAGE = 30
+
+
+def _competitors(n, paginated):
+    comps = []
+    for i in range(n):
+        url = f"https://example.test/{i}/releases"
+        comp = {"name": f"Bench {i}", "changelog": url}
+        if i < paginated:
+            comp["sources"] = [{"url": url, "paginate": {"param": "page"}}]
+        comps.append(comp)
+    return comps
+
+
+def _page(run, page):
+    newest = run - page * PER_PAGE
+    rows = [f"<li>Release {n}: added export format {n} and fixed dashboard crash {n}</li>"
+            for n in range(newest, max(newest - PER_PAGE, 0), -1)]
+    return "\n".join(["<html><body>", "<nav>Home Pricing Docs</nav>", "<ul>", *rows, "</ul>", "</body></html>"])
+
+
+def build_archive(comps, pages):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    written, run = 0, 0
+    while written < pages:
+        for comp in comps:
+            if written >= pages:
+                break
+            n_pages = 2 if comp.get("sources") and run % 5 == 0 else 1
+            replay.archive_run(comp["name"], [(0, p, _page(run + 1, p)) for p in range(n_pages)],
+                               when=start + timedelta(minutes=run))
+            written += n_pages
+        run += 1
+    return written
+
+
+def _rss_mb(who):
+    return resource.getrusage(who).ru_maxrss / 1024  # KiB on Linux
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=1_000_000)
+    parser.add_argument("--competitors", type=int, default=10)
+    parser.add_argument("--paginated", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=replay.BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench-replay-")
+    try:
+        replay.ARCHIVE_DIR = os.path.join(tmp, "archive")
+        replay.REPLAY_DIR = os.path.join(tmp, "replay")
+        config.COMPETITORS = _competitors(args.competitors, args.paginated)
+
+        started = time.perf_counter()
+        written = build_archive(config.COMPETITORS, args.pages)
+        print(f"archive: {written} pages, {args.competitors} competitors "
+              f"({args.paginated} paginated), built in {time.perf_counter() - started:.0f}s")
+
+        stats = replay.replay(workers=args.workers, dry_run=True, batch_size=args.batch_size)
+        print(f"replay: {stats['pages']} runs, {stats['events']} events, {stats['seconds']:.0f}s, "
+              f"{stats['pagesPerSec']:.0f} runs/sec")
+        print(f"peak RSS: parent {_rss_mb(resource.RUSAGE_SELF):.0f} MB, "
+              f"largest worker {_rss_mb(resource.RUSAGE_CHILDREN):.0f} MB")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
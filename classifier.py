@@ -0,0 +1,283 @@
+# classifier.py
+"""
+Local change classifier.
+
+Tags each detected changelog line as one of CHANGE_TYPES with a confidence
+score *before* anything is sent to the LLM, so that:
+- change events carry a real type (analytics reads it directly)
+- low-value lines (noise / docs) never reach Groq
+
+Two cheap signals are combined per line:
+1. a compiled keyword/regex automaton over tokens (named groups → type) plus a
+   short list of multi-word keyword phrases
+2. a tiny linear model over hashed unigram + bigram features
+
+Pure stdlib; no training step. Weights are seeded from the lexicon below and
+hashed (zlib.crc32, stable across processes — replay workers must agree) into
+a fixed-size table at import time. Features are binary and each distinct
+token / bigram is scored once and memoized, so the hot path is one byte-table
+tokenize + one set intersection per line (target: 100k lines/sec on one core;
+see tests/test_classifier.py).
+"""
+
+import math
+import re
+import threading
+import zlib
+from typing import Dict, Iterable, List, Tuple
+
+CHANGE_TYPES = ("feature", "pricing", "deprecation", "fix", "docs", "noise")
+
+# Types that are not worth LLM tokens (see summarizer.summarize_all)
+LOW_VALUE_TYPES = ("noise", "docs")
+
+# --- Keyword automaton ------------------------------------------------------
+# Token patterns: type -> (regex fragment, weight). Joined into ONE alternation
+# with named groups and full-matched against each *distinct* token (memoized),
+# so the regex never rescans whole lines.
+_KEYWORDS = {
+    "pricing": (r"pric\w*|plans?|tiers?|billing|subscriptions?|discounts?", 3.0),
+    "deprecation": (r"deprecat\w*|sunset\w*|eol|removed?|removing|discontinu\w*|retir(?:e|ed|es|ing)", 3.0),
+    "fix": (r"fix(?:es|ed|ing)?|bugs?|bugfix\w*|patch(?:ed|es)?|crash\w*|resolv(?:e|ed|es|ing)|"
+            r"regressions?|hotfix\w*", 2.5),
+    "docs": (r"docs?|documentation|readme|typos?|guides?|tutorials?|examples?", 2.0),
+    "feature": (r"new|introduc\w*|launch\w*|added|adds?|adding|releas(?:e|ed|es|ing)|beta|"
+                r"integrations?|improv\w*|enhanc\w*", 2.0),
+}
+_KEYWORD_RE = re.compile(
+    "|".join(f"(?P<{t}>{frag})" for t, (frag, _w) in _KEYWORDS.items()).encode("ascii")
+)
+_KEYWORD_WEIGHT = {t: w for t, (_frag, w) in _KEYWORDS.items()}
+
+# Multi-word keywords, matched as bigrams (same weight as the type's keywords).
+_KEYWORD_PHRASES = {
+    "pricing": ("free plan", "free tier", "free trial", "per seat", "per user", "per month"),
+    "deprecation": ("no longer", "of life", "breaking change", "breaking changes"),
+    "fix": ("issue with", "security fix", "security patch"),
+    "docs": ("changelog entry", "api reference"),
+    "feature": ("now available", "now supports", "now support", "you can", "support for"),
+}
+_CURRENCY_RE = re.compile(r"[$€£]\s?\d")
+
+# Lines that are navigation / chrome / metadata rather than content.
+_NOISE_RE = re.compile(
+    r"^\s*(?:"
+    r"[\W\d_]*"                                   # punctuation / numbers only
+    r"|v?\d+(?:\.\d+)+(?:[-+.\w]*)?"              # bare version tag
+    r"|(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*\.?\s+\d{1,2},?\s+\d{4}"  # bare date
+    r"|\d{4}-\d{2}-\d{2}"                         # ISO date
+    r"|(?:sign\s+(?:in|up)|log\s*in|menu|home|pricing|blog|contact(?:\s+us)?|careers|"
+    r"privacy(?:\s+policy)?|terms(?:\s+of\s+service)?|cookies?.*|skip\s+to\s+content|"
+    r"read\s+more|learn\s+more|subscribe|get\s+started|toggle\s+navigation|"
+    r"(?:©|copyright).*|all\s+rights\s+reserved.*|load\s+more|next|previous|back\s+to\s+top)"
+    r")\s*$",
+    re.IGNORECASE,
+)
+
+# --- Hashed n-gram linear model ---------------------------------------------
+_N_FEATURES = 1 << 16
+_MASK = _N_FEATURES - 1
+# Tokenizer: UTF-8 bytes through a 256-entry table (ASCII letters lowercased,
+# everything else → space), then split. Yields the same tokens as
+# re.findall(r"[a-z]+", line.lower()) at a fraction of the cost; tokens are bytes.
+# Digits are dropped: versions, dates and counts carry no change-type signal
+# (prices are caught by _CURRENCY_RE) and would only grow the memo tables.
+_TOKEN_TABLE = bytes((b | 0x20) if 65 <= b <= 90 or 97 <= b <= 122 else 32 for b in range(256))
+
+# Seed lexicon: phrase -> {type: weight}. Unigrams and bigrams only.
+_SEED: Dict[str, Dict[str, float]] = {
+    # feature
+    "new feature": {"feature": 2.0}, "you can": {"feature": 1.0}, "now available": {"feature": 1.5},
+    "we added": {"feature": 1.5}, "introducing": {"feature": 1.5}, "dashboard": {"feature": 0.5},
+    "api": {"feature": 0.5}, "export": {"feature": 0.6}, "import": {"feature": 0.6},
+    "dark mode": {"feature": 1.0}, "integration": {"feature": 1.0}, "custom": {"feature": 0.5},
+    "faster": {"feature": 0.8}, "performance": {"feature": 0.6, "fix": 0.3},
+    # pricing
+    "pricing": {"pricing": 2.0}, "plan": {"pricing": 1.0}, "plans": {"pricing": 1.0},
+    "enterprise": {"pricing": 0.8}, "pro plan": {"pricing": 1.5}, "per month": {"pricing": 1.5},
+    "usage limits": {"pricing": 1.0}, "price increase": {"pricing": 2.0}, "trial": {"pricing": 0.8},
+    # deprecation
+    "deprecated": {"deprecation": 2.0}, "be removed": {"deprecation": 2.0},
+    "no longer": {"deprecation": 1.5}, "legacy": {"deprecation": 1.0}, "migrate": {"deprecation": 1.0},
+    "migration": {"deprecation": 0.8}, "breaking": {"deprecation": 1.5}, "sunset": {"deprecation": 2.0},
+    # fix
+    "fixed": {"fix": 2.0}, "bug": {"fix": 1.5}, "bugs": {"fix": 1.5}, "crash": {"fix": 1.5},
+    "error when": {"fix": 1.5}, "issue where": {"fix": 2.0}, "minor": {"fix": 0.8, "noise": 0.3},
+    "stability": {"fix": 1.0}, "vulnerability": {"fix": 1.5}, "security": {"fix": 0.8},
+    # docs
+    "docs": {"docs": 2.0}, "documentation": {"docs": 2.0}, "typo": {"docs": 2.0},
+    "readme": {"docs": 2.0}, "guide": {"docs": 1.0}, "clarified": {"docs": 1.0},
+    # noise
+    "cookie": {"noise": 2.0}, "cookies": {"noise": 2.0}, "newsletter": {"noise": 1.5},
+    "sign up": {"noise": 1.5}, "follow us": {"noise": 2.0}, "twitter": {"noise": 1.0},
+    "all rights": {"noise": 2.0}, "read more": {"noise": 2.0}, "posted by": {"noise": 1.5},
+}
+
+_TYPE_INDEX = {t: i for i, t in enumerate(CHANGE_TYPES)}
+_NOISE_IDX = _TYPE_INDEX["noise"]
+_PRICING_IDX = _TYPE_INDEX["pricing"]
+
+
+def _feature_index(gram: bytes) -> int:
+    # crc32, not hash(): str hashing is randomized per process, which would
+    # make bucket collisions (and thus scores) differ between runs/workers.
+    return zlib.crc32(gram) & _MASK
+
+
+def _build_weights() -> Dict[int, Tuple[Tuple[int, float], ...]]:
+    """Hashed feature index -> sparse ((type_idx, weight), ...) row."""
+    table: Dict[int, Dict[int, float]] = {}
+    for phrase, weights in _SEED.items():
+        row = table.setdefault(_feature_index(phrase.encode("ascii")), {})
+        for t, w in weights.items():
+            row[_TYPE_INDEX[t]] = row.get(_TYPE_INDEX[t], 0.0) + w
+    return {k: tuple(v.items()) for k, v in table.items()}
+
+
+_WEIGHTS = _build_weights()
+_PHRASE_TYPES = {p.encode("ascii"): t for t, phrases in _KEYWORD_PHRASES.items() for p in phrases}
+
+
+def _build_bigram_tails() -> Dict[bytes, frozenset]:
+    """Bigram features are the seeded / keyword phrases only: head token -> known tails."""
+    tails: Dict[bytes, set] = {}
+    for gram in [p.encode("ascii") for p in _SEED] + list(_PHRASE_TYPES):
+        if b" " in gram:
+            head, tail = gram.split(b" ", 1)
+            tails.setdefault(head, set()).add(tail)
+    return {head: frozenset(t) for head, t in tails.items()}
+
+
+_BIGRAM_TAILS = _build_bigram_tails()
+# A line is only scanned for bigrams when it contains a head and a tail token.
+_BIGRAM_HEADS = frozenset(_BIGRAM_TAILS)
+_BIGRAM_TAIL_TOKENS = frozenset().union(*_BIGRAM_TAILS.values())
+_BIAS = (0.0, 0.0, 0.0, 0.0, 0.0, 0.3)  # mild prior toward noise for content-free lines
+
+# Per-gram rows (keyword + hashed weights), computed the first time a token or
+# known bigram is seen. Only grams with a non-empty row are kept in _ROWS, so the
+# hot path is a set intersection. Purely caches: results are identical with or
+# without them; each is cleared when it grows past _MEMO_MAX entries.
+# classify() runs in server request threads and the scraper's fetch pool, so the
+# memos are read and written under _memo_lock: a clear by one thread must not
+# leave another with a key whose grams are no longer in _ROWS.
+_MEMO_MAX = 200_000
+_memo_lock = threading.Lock()
+_SEEN: set = set()
+_ROWS: Dict[bytes, Tuple[Tuple[int, float], ...]] = {}
+_SIGNAL: set = set()  # keys of _ROWS, as a set for fast intersection
+# (signal grams, currency, length bucket) → result. Lines share far fewer
+# distinct signal sets than they have text, so most lines skip scoring.
+_DECISIONS: Dict[tuple, Tuple[str, float]] = {}
+
+
+def _gram_row(gram: bytes) -> Tuple[Tuple[int, float], ...]:
+    """Keyword weight (token pattern or phrase) + hashed seed weights for one gram."""
+    row: Dict[int, float] = {}
+    if b" " in gram:
+        t = _PHRASE_TYPES.get(gram)
+    else:
+        m = _KEYWORD_RE.fullmatch(gram)
+        t = m.lastgroup if m else None
+    if t is not None:
+        row[_TYPE_INDEX[t]] = _KEYWORD_WEIGHT[t]
+    for i, w in _WEIGHTS.get(_feature_index(gram), ()):
+        row[i] = row.get(i, 0.0) + w
+    return tuple(row.items())
+
+
+def _head_bigrams(tokens: List[bytes], grams: set) -> List[bytes]:
+    """Known bigrams (see _BIGRAM_TAILS) occurring in tokens."""
+    out = []
+    last = len(tokens) - 1
+    for head in grams.intersection(_BIGRAM_HEADS):
+        tails = _BIGRAM_TAILS[head]
+        if tails.isdisjoint(grams):
+            continue
+        k = -1
+        for _ in range(tokens.count(head)):
+            k = tokens.index(head, k + 1)
+            if k < last and tokens[k + 1] in tails:
+                out.append(head + b" " + tokens[k + 1])
+    return out
+
+
+def _learn(grams: set) -> None:
+    """Score the grams of one line not seen before. Caller holds _memo_lock."""
+    if len(_SEEN) >= _MEMO_MAX:
+        _SEEN.clear()
+        _ROWS.clear()
+        _SIGNAL.clear()
+    for gram in grams - _SEEN:
+        row = _gram_row(gram)
+        if row:
+            _ROWS[gram] = row
+            _SIGNAL.add(gram)
+    _SEEN.update(grams)
+
+
+def _decide(key) -> Tuple[str, float]:
+    """Score one feature set → (type, confidence). Memoized in _DECISIONS; caller holds _memo_lock."""
+    signal, currency, length = key
+    scores = list(_BIAS)
+    if currency:
+        scores[_PRICING_IDX] += _KEYWORD_WEIGHT["pricing"]
+    for gram in sorted(signal):  # fixed order → identical float sums in every process
+        for i, w in _ROWS[gram]:
+            scores[i] += w
+
+    # Very short fragments with no signal are almost always chrome
+    if length == 0:
+        scores[_NOISE_IDX] += 1.0
+
+    top = max(scores)
+    best = scores.index(top)
+    if top <= _BIAS[best]:
+        # no signal at all: generic content line, treat as a (weak) feature/update
+        best = _TYPE_INDEX["feature"] if length == 2 else _NOISE_IDX
+        top = scores[best]
+    denom = sum(map(math.exp, map(top.__rsub__, scores)))  # softmax, shifted by the max
+    result = CHANGE_TYPES[best], round(1.0 / denom, 3)
+    if len(_DECISIONS) >= _MEMO_MAX:
+        _DECISIONS.clear()
+    _DECISIONS[key] = result
+    return result
+
+
+# --- Public API -------------------------------------------------------------
+def classify(line: str) -> Tuple[str, float]:
+    """
+    Classify one change line.
+    Returns (type, score) where type is in CHANGE_TYPES and score is a
+    softmax confidence in [0, 1].
+    """
+    text = line.strip()
+    if len(text) < 4 or _NOISE_RE.match(text):
+        return "noise", 1.0
+
+    currency = ("$" in text or "€" in text or "£" in text) and _CURRENCY_RE.search(text) is not None
+
+    # keyword automaton + hashed unigram/bigram features. Features are binary
+    # (present or not), so a line reduces to the set of signal grams it contains.
+    tokens = text.encode("utf-8").translate(_TOKEN_TABLE).split()
+    grams = set(tokens)
+    if not _BIGRAM_HEADS.isdisjoint(grams) and not _BIGRAM_TAIL_TOKENS.isdisjoint(grams):
+        grams.update(_head_bigrams(tokens, grams))
+    n = len(tokens)
+    length = 0 if n <= 2 else 1 if n <= 4 else 2
+    with _memo_lock:
+        if not grams <= _SEEN:
+            _learn(grams)
+        key = (frozenset(grams.intersection(_SIGNAL)), currency, length)
+        result = _DECISIONS.get(key)
+        return result if result is not None else _decide(key)
+
+
+def classify_many(lines: Iterable[str]) -> List[Tuple[str, float]]:
+    """Vectorized-style convenience wrapper: classify a batch of lines."""
+    return [classify(line) for line in lines]
+
+
+def is_low_value(change_type: str) -> bool:
+    """True if lines of this type should skip the LLM."""
+    return change_type in LOW_VALUE_TYPES
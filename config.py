@@ -13,10 +13,18 @@ import os
 COMPETITORS = [
     # Small / indie OSS
     {"name": "Plausible Analytics", "changelog": "https://plausible.io/changelog"},
-    {"name": "Ackee",               "changelog": "https://github.com/electerious/Ackee/releases"},
+    {"name": "Ackee",               "changelog": "https://github.com/electerious/Ackee/releases",
+     "sources": [
+         {"url": "https://github.com/electerious/Ackee/releases", "paginate": {"param": "page"}},
+         {"url": "https://github.com/electerious/Ackee/releases.atom"},
+     ]},
     {"name": "Cal.com",             "changelog": "https://cal.com/changelog"},
     {"name": "Umami Analytics",     "changelog": "https://umami.is/changelog"},
-    {"name": "Directus",            "changelog": "https://directus.io/releases"},
+    {"name": "Directus",            "changelog": "https://directus.io/releases",
+     "sources": [
+         {"url": "https://github.com/directus/directus/releases", "paginate": {"param": "page"}},
+         {"url": "https://directus.io/releases"},
+     ]},
 
     # Indie SaaS / productivity
     {"name": "Height",              "changelog": "https://height.app/changelog"},
@@ -26,6 +34,9 @@ COMPETITORS = [
     {"name": "Superlist",           "changelog": "https://superlist.com/changelog"},
 ]
 
+# Optional per-competitor "sources": several URLs (feed, blog, status page...)
+# with pagination rules; see crawler.py. Without it, "changelog" is the only source.
+
 # --- NSFW filtering ---------------------------------------------------------
 # Simple substring match against domain. Extend as needed.
 NSFW_KEYWORDS = ["porn", "adult", "xxx", "sex", "nsfw"]
@@ -36,7 +47,16 @@ NSFW_ALLOWLIST = []  # e.g., ["example.com"]
 # --- Behavior flags ---------------------------------------------------------
 ALWAYS_NOTIFY = True               # send Slack even if no changes (good for testing)
 MAX_LINES_PER_COMPETITOR = 50      # safety trim before diffing
+CRAWL_MAX_PAGES = 10               # per paginated source; crawling stops earlier at known entries
+MAX_SNAPSHOT_LINES = 5000          # cap for merged snapshots of paginated competitors
+FETCH_CACHE_TTL = int(os.getenv("FETCH_CACHE_TTL", "300"))  # seconds a fetched page is reused
+ARCHIVE_RAW_PAGES = os.getenv("ARCHIVE_RAW_PAGES", "0") == "1"  # keep raw fetches for `main.py replay`
+PUSH_SAFETY_POLL_HOURS = 24        # push-subscribed competitors: polling becomes a daily safety net
+HISTORY_KEYFRAME_EVERY = 50        # snapshot history: full copy every N versions (bounds rebuild cost)
 
 # --- Secrets via env --------------------------------------------------------
 SLACK_WEBHOOK = os.getenv("SLACK_WEBHOOK")
 GROQ_API_KEY  = os.getenv("GROQ_API_KEY")
+
+# Public base URL of server.py (for WebSub / webhook callbacks), e.g. https://monitor.example.com
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL")
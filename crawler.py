@@ -0,0 +1,227 @@
+# crawler.py
+"""
+Multi-source, paginated changelog crawling with incremental stop.
+
+A competitor may declare several sources (release page, feed, blog, status
+page...) and per-source pagination instead of a single `changelog` URL:
+
+    {"name": "Ackee",
+     "changelog": "https://github.com/electerious/Ackee/releases",
+     "sources": [
+         {"url": "https://github.com/electerious/Ackee/releases",
+          "paginate": {"param": "page", "max_pages": 10}},
+     ]}
+
+Pagination rules (per source, optional):
+    {"param": "page", "start": 1}   → ?page=2, ?page=3, ... (first page = url as given)
+    {"next": "link"}                → follow rel="next" links found in the page
+    "max_pages": N                  → hard cap (default config.CRAWL_MAX_PAGES)
+
+Pages are walked newest-first. We stop at the first page that contains an
+entry we already know (from the previous snapshot), or that has no entries at
+all — so steady-state cost is ~one request per source. Only entry lines count
+(see entry_texts): markup, scripts and per-request chrome such as CSRF/nonce
+meta tags never decide the stop.
+
+Body chrome that survives entry_texts ("Choose a tag to compare", session
+banners) is on every page, so it is learned per source as the entries shared
+by all pages of a multi-page crawl and ignored when deciding the stop. Until a
+source's chrome is known, its crawl never stops on a match at page one.
+Callers keep the learned chrome between runs (main.run stores it under
+chrome_key).
+"""
+
+import html
+import re
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlunparse
+
+import config
+from classifier import classify
+from scraper import fetch_changelog, extract_lines
+
+_NEXT_TAG_RE = re.compile(r"<(?:a|link)\b[^>]*\brel=[\"']?next\b[^>]*>", re.IGNORECASE)
+_HREF_RE = re.compile(r"\bhref=[\"']([^\"']+)[\"']", re.IGNORECASE)
+_BLOCK_RE = re.compile(r"<(script|style|head|template|noscript|nav|footer)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]*>")
+_SPACE_RE = re.compile(r"\s+")
+
+# line → entry text or None; snapshots re-check the same lines every run
+_ENTRY_MEMO = {}
+_ENTRY_MEMO_MAX = 200_000
+
+
+def competitor_sources(comp):
+    """Normalized source list; legacy entries get their `changelog` URL as the only source."""
+    sources = comp.get("sources")
+    if sources:
+        return [s if isinstance(s, dict) else {"url": s} for s in sources]
+    return [{"url": comp["changelog"]}]
+
+
+def is_paginated(comp):
+    """True if any source crawls beyond its first page."""
+    return any(s.get("paginate") for s in competitor_sources(comp))
+
+
+def _with_query(url, key, value):
+    parts = urlparse(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != key]
+    query.append((key, str(value)))
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+
+def _next_link(raw, base_url):
+    for tag in _NEXT_TAG_RE.findall(raw):
+        m = _HREF_RE.search(tag)
+        if m:
+            return urljoin(base_url, m.group(1).replace("&amp;", "&"))
+    return None
+
+
+def _next_url(rule, source_url, page_url, page_no, raw):
+    """URL of page `page_no + 1` (0-based page_no just fetched), or None."""
+    if "param" in rule:
+        return _with_query(source_url, rule["param"], rule.get("start", 1) + page_no + 1)
+    if rule.get("next") == "link":
+        return _next_link(raw, page_url)
+    return None
+
+
+def chrome_key(name):
+    """Snapshot key under which a competitor's learned page chrome is stored."""
+    return f"{name}.chrome"
+
+
+def _entry_text(line):
+    """Entry text of one line (blocks already removed), or None if it is not an entry."""
+    try:
+        return _ENTRY_MEMO[line]
+    except KeyError:
+        pass
+    visible = _SPACE_RE.sub(" ", html.unescape(_TAG_RE.sub(" ", line))).strip()
+    entry = visible if visible and classify(visible)[0] != "noise" else None
+    if len(_ENTRY_MEMO) >= _ENTRY_MEMO_MAX:
+        _ENTRY_MEMO.clear()
+    _ENTRY_MEMO[line] = entry
+    return entry
+
+
+def _entry_lines(lines):
+    """Yield (index into lines, visible text) for lines that look like entries."""
+    # blocks become blank lines so indexes still line up with `lines`
+    text = _BLOCK_RE.sub(lambda m: "\n" * m.group(0).count("\n"), "\n".join(lines))
+    for i, line in enumerate(text.split("\n")):
+        entry = _entry_text(line) if line else None
+        if entry:
+            yield i, entry
+
+
+def entry_texts(lines):
+    """
+    Visible text of the lines that look like changelog entries: script, style,
+    head, nav and footer blocks and all tags are stripped, and lines the
+    classifier tags as noise (menus, dates, version-only headings) are dropped.
+    Returns a set.
+    """
+    return {visible for _, visible in _entry_lines(lines)}
+
+
+def crawl_source(source, known_entries, seen, stats=None, raw_pages=None, chrome=None):
+    """
+    Crawl one source newest-first.
+    known_entries: entry_texts() of the previous snapshot; seen: lines collected
+    earlier this run (updated in place; repeated page chrome is kept once);
+    raw_pages: optional list collecting raw page text;
+    chrome: {source url: [chrome entries]} learned by earlier crawls, updated
+    in place when this crawl sees two or more pages.
+    Returns (lines, pages_fetched).
+    """
+    rule = source.get("paginate") or {}
+    max_pages = rule.get("max_pages", config.CRAWL_MAX_PAGES) if rule else 1
+    url = source["url"]
+    chrome = {} if chrome is None else chrome
+    learned = set(chrome[url]) if url in chrome else None
+    lines, pages, visited, shared = [], 0, set(), None
+
+    while url and pages < max_pages and url not in visited:
+        visited.add(url)
+        raw = fetch_changelog(url, stats=stats)
+        pages += 1
+        if raw is None:
+            break
+        if raw_pages is not None:
+            raw_pages.append(raw)
+
+        page_lines = extract_lines(raw)
+        lines.extend(l for l in page_lines if l not in seen)
+        seen.update(page_lines)
+        if not rule:
+            break
+        entries = entry_texts(page_lines)
+        shared = entries if shared is None else shared & entries
+        if pages == 1 and learned is None:
+            # chrome unknown: one page cannot tell chrome from a known entry
+            if not entries:
+                break
+        else:
+            body = entries - (learned or set()) - (shared if pages > 1 else set())
+            if not body or not body.isdisjoint(known_entries):
+                break  # past the last page, or reached history we already have
+        url = _next_url(rule, source["url"], url, pages - 1, raw)
+
+    if rule and pages > 1 and shared is not None:
+        chrome[source["url"]] = sorted(shared)
+    return lines, pages
+
+
+def crawl_competitor(comp, known, stats=None, raw_pages=None, chrome=None, failed=None):
+    """
+    Crawl all sources of a competitor.
+    raw_pages: optional list collecting (source_index, page_index, raw page text);
+    chrome: learned page chrome per source (see crawl_source), updated in place;
+    failed: optional list collecting the URLs of sources that returned nothing.
+    Returns (lines, pages_fetched) or (None, pages_fetched) if every source failed.
+    """
+    sources = competitor_sources(comp)
+    known_entries = entry_texts(known) if any(s.get("paginate") for s in sources) else set()
+    seen = set()
+    all_lines, total_pages, ok = [], 0, False
+    for index, source in enumerate(sources):
+        fetched = [] if raw_pages is not None else None
+        lines, pages = crawl_source(source, known_entries, seen, stats=stats,
+                                    raw_pages=fetched, chrome=chrome)
+        if raw_pages is not None:
+            raw_pages.extend((index, page, raw) for page, raw in enumerate(fetched))
+        total_pages += pages
+        if lines:
+            ok = True
+            all_lines.extend(lines)
+        elif failed is not None:
+            failed.append(source["url"])
+    return (all_lines if ok else None), total_pages
+
+
+def merge_snapshot(old, new, limit=None, tail=0):
+    """
+    Snapshot for partial runs (paginated competitors, failed sources, pushed
+    fragments): this run's lines first (all of them, never truncated), then
+    previously known entry lines we did not re-fetch (deeper pages), deduplicated,
+    filling up to `limit`. Old markup and volatile lines (CSRF tokens, nonces) are
+    not carried forward, so they never crowd out deep entries. Keeping the deep
+    lines is what lets the next run stop early.
+
+    tail: number of trailing lines of `old` that are the carried-forward entries
+    of an earlier merge_snapshot, so only the rest of `old` is filtered again
+    (replay merges every run of a competitor in turn).
+    """
+    limit = limit or config.MAX_SNAPSHOT_LINES
+    current = set(new)
+    head = list(dict.fromkeys(old[:len(old) - tail]))
+    older = [head[i] for i, _ in _entry_lines(head) if head[i] not in current]
+    if tail:
+        # an earlier merge already dropped its own lines from these
+        rest = old[len(old) - tail:]
+        if not current.isdisjoint(rest):
+            rest = [l for l in rest if l not in current]
+        older += rest
+    return list(new) + older[:max(limit - len(new), 0)]
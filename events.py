@@ -0,0 +1,200 @@
+# events.py
+"""
+Append-only change-event log (data/events.jsonl).
+
+The dashboard keeps only the last 100 events in memory; every event is also
+appended here with a monotonically increasing id so history can be exported
+in full. Ids double as the keyset cursor: readers resume with `after=<id>`.
+
+A sparse in-memory index (id → byte offset every INDEX_EVERY events) lets a
+resumed read seek close to its cursor instead of scanning from the start.
+Reads are generators, so memory stays flat regardless of log size.
+
+Deleting a competitor's events can remove the newest ids, so the highest id
+ever assigned is also kept in a sidecar (<EVENTS_PATH>.lastid); ids are never
+reused, even after a restart.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+EVENTS_PATH = "data/events.jsonl"
+INDEX_EVERY = 10000
+
+_lock = threading.Lock()
+_state = {"path": None, "last_id": None, "size": 0, "index": None}
+
+
+def parse_timestamp(ts):
+    """ISO8601 (or trailing Z) → aware UTC datetime; ValueError if malformed."""
+    txt = (ts or "").strip()
+    if txt.endswith("Z"):
+        txt = txt[:-1] + "+00:00"
+    dt = datetime.fromisoformat(txt)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _last_id_on_disk(path):
+    """Id of the last complete line (reads only the file tail)."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return 0
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        block = min(size, 64 * 1024)
+        while True:
+            f.seek(size - block)
+            lines = f.read(block).splitlines()
+            complete = [l for l in lines if l.strip()]
+            if len(complete) > 1 or block == size:
+                break
+            block = min(size, block * 2)
+    for line in reversed(complete):
+        try:
+            return int(json.loads(line)["id"])
+        except (ValueError, KeyError):
+            continue
+    return 0
+
+
+def _last_id_saved(path):
+    """High-water mark written by delete_competitor_events (0 if none)."""
+    try:
+        with open(path + ".lastid") as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _save_last_id(path, last_id):
+    tmp = path + ".lastid.tmp"
+    with open(tmp, "w") as f:
+        f.write(str(last_id))
+    os.replace(tmp, path + ".lastid")
+
+
+def _sync():
+    """(Re)load id counter / index if the log path changed or was modified externally."""
+    path = EVENTS_PATH
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    if _state["path"] != path or _state["size"] != size:
+        last_id = max(_last_id_on_disk(path), _last_id_saved(path))
+        _state.update(path=path, last_id=last_id, size=size, index=None)
+
+
+def _build_index():
+    """Scan once for (id, offset) every INDEX_EVERY events."""
+    index = [(0, 0)]
+    if os.path.exists(EVENTS_PATH):
+        with open(EVENTS_PATH, "rb") as f:
+            offset, n = 0, 0
+            for line in f:
+                n += 1
+                if n % INDEX_EVERY == 0:
+                    index.append((int(json.loads(line)["id"]), offset + len(line)))
+                offset += len(line)
+    return index
+
+
+def append_events(events):
+    """Assign ids and append events (list of dicts, updated in place). Returns them."""
+    if not events:
+        return events
+    with _lock:
+        _sync()
+        os.makedirs(os.path.dirname(EVENTS_PATH), exist_ok=True)
+        with open(EVENTS_PATH, "ab") as f:
+            for ev in events:
+                _state["last_id"] += 1
+                ev["id"] = _state["last_id"]
+                line = (json.dumps(ev, separators=(",", ":")) + "\n").encode("utf-8")
+                f.write(line)
+                _state["size"] += len(line)
+                index = _state["index"]
+                if index is not None and ev["id"] % INDEX_EVERY == 0:
+                    index.append((ev["id"], _state["size"]))
+    return events
+
+
+def _seek_offset(after):
+    with _lock:
+        _sync()
+        if _state["index"] is None:
+            _state["index"] = _build_index()
+        best = 0
+        for ev_id, offset in _state["index"]:
+            if ev_id > after:
+                break
+            best = offset
+        return best
+
+
+def iter_events(after=0, competitor=None, since=None, until=None, category=None, limit=None,
+                parse=True):
+    """
+    Yield (id, raw_json_line, event) in id order for events with id > after
+    that match the filters. since/until are ISO timestamps (inclusive / exclusive).
+    parse=False lets unfiltered readers skip JSON decoding once past the cursor
+    (ids are monotonic); those rows are yielded as (None, raw_line, None).
+    """
+    if not os.path.exists(EVENTS_PATH):
+        return
+    since_dt = parse_timestamp(since) if since else None
+    until_dt = parse_timestamp(until) if until else None
+    offset = _seek_offset(after) if after else 0
+    fast = not parse and not (competitor or category or since_dt or until_dt)
+    past_cursor = False
+    emitted = 0
+
+    with open(EVENTS_PATH, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break  # partially written tail
+            if past_cursor:
+                yield None, raw, None
+                emitted += 1
+                if limit and emitted >= limit:
+                    return
+                continue
+            ev = json.loads(raw)
+            if ev["id"] <= after:
+                continue
+            if competitor and ev.get("competitor") != competitor:
+                continue
+            if category and ev.get("category") != category:
+                continue
+            if since_dt or until_dt:
+                ts = parse_timestamp(ev.get("timestamp"))
+                if (since_dt and ts < since_dt) or (until_dt and ts >= until_dt):
+                    continue
+            yield ev["id"], raw, ev
+            past_cursor = fast
+            emitted += 1
+            if limit and emitted >= limit:
+                return
+
+
+def delete_competitor_events(name):
+    """Rewrite the log without a competitor's events (streamed). Returns count removed."""
+    if not os.path.exists(EVENTS_PATH):
+        return 0
+    removed = 0
+    with _lock:
+        _sync()
+        tmp = EVENTS_PATH + ".tmp"
+        with open(EVENTS_PATH, "rb") as src, open(tmp, "wb") as dst:
+            for raw in src:
+                if json.loads(raw).get("competitor") == name:
+                    removed += 1
+                else:
+                    dst.write(raw)
+        # persist the id counter first: the rewrite may drop the newest ids
+        _save_last_id(EVENTS_PATH, _state["last_id"])
+        os.replace(tmp, EVENTS_PATH)
+        # offsets changed, so drop the index
+        _state.update(size=os.path.getsize(EVENTS_PATH), index=None)
+    return removed
@@ -0,0 +1,225 @@
+# history.py
+"""
+Append-only, versioned snapshot history per competitor.
+
+diff_detector keeps only the *latest* snapshot (data/<name>.json). This module
+records every distinct version so we can rebuild any past page and diff any
+two points in time.
+
+Storage: one JSON-lines log per competitor under data/history/<name>.jsonl.
+Each entry is one of:
+- "full"  → zlib-compressed full line list (keyframe)
+- "delta" → zlib-compressed line edits against the previous version
+- "same"  → content identical to an older version (dedup; no payload)
+
+A run whose content matches the latest version appends nothing, so disk use
+grows with the amount of change, not page size × run count. A keyframe is
+written every config.HISTORY_KEYFRAME_EVERY deltas to bound rebuild cost.
+"""
+
+import base64
+import difflib
+import hashlib
+import json
+import os
+import threading
+import zlib
+from datetime import datetime, timezone
+
+import config
+
+HISTORY_DIR = "data/history/"
+
+_lock = threading.Lock()
+_index = {}  # key -> {"size": log size in bytes, "entries": [...], "by_sha": {sha: v}}
+
+
+# --- Encoding helpers -------------------------------------------------------
+def _sha(lines):
+    return hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
+
+
+def _pack(obj):
+    raw = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    return base64.b64encode(zlib.compress(raw, 6)).decode("ascii")
+
+
+def _unpack(data):
+    return json.loads(zlib.decompress(base64.b64decode(data)))
+
+
+def _make_delta(old, new):
+    """Line edits turning old into new: [[i1, i2, replacement_lines], ...]."""
+    sm = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    return [[i1, i2, new[j1:j2]] for tag, i1, i2, j1, j2 in sm.get_opcodes() if tag != "equal"]
+
+
+def _apply_delta(old, ops):
+    out, pos = [], 0
+    for i1, i2, repl in ops:
+        out.extend(old[pos:i1])
+        out.extend(repl)
+        pos = i2
+    out.extend(old[pos:])
+    return out
+
+
+def _utcnow_iso():
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+# --- Log / index ------------------------------------------------------------
+def _log_path(key):
+    return os.path.join(HISTORY_DIR, f"{key}.jsonl")
+
+
+def _load_index(key):
+    """Return cached index for key, (re)reading the log if it changed on disk."""
+    path = _log_path(key)
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    idx = _index.get(key)
+    if idx is not None and idx["size"] == size:
+        return idx
+    entries, by_sha = [], {}
+    if size:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    e = json.loads(line)
+                    entries.append(e)
+                    by_sha.setdefault(e["sha"], e["v"])
+    idx = _index[key] = {"size": size, "entries": entries, "by_sha": by_sha, "latest": None}
+    return idx
+
+
+def _rebuild(idx, v):
+    entries = idx["entries"]
+    e = entries[v]
+    while e["kind"] == "same":
+        e = entries[e["ref"]]
+    # walk back to the nearest keyframe, then replay deltas forward
+    chain = []
+    while e["kind"] == "delta":
+        chain.append(e)
+        e = entries[e["v"] - 1]
+        while e["kind"] == "same":
+            e = entries[e["ref"]]
+    lines = _unpack(e["data"])
+    for d in reversed(chain):
+        lines = _apply_delta(lines, _unpack(d["data"]))
+    return lines
+
+
+# --- Public API -------------------------------------------------------------
+def record_version(key, lines, timestamp=None):
+    """
+    Append `lines` as a new version of `key` unless identical to the latest.
+    Returns the version number holding this content.
+    """
+    sha = _sha(lines)
+    with _lock:
+        idx = _load_index(key)
+        entries = idx["entries"]
+        if entries and entries[-1]["sha"] == sha:
+            return entries[-1]["v"]
+
+        v = len(entries)
+        entry = {"v": v, "ts": timestamp or _utcnow_iso(), "sha": sha}
+        since_key = 0
+        for e in reversed(entries):
+            if e["kind"] == "full":
+                break
+            since_key += 1
+
+        if sha in idx["by_sha"]:
+            entry.update(kind="same", ref=idx["by_sha"][sha])
+        elif not entries or since_key + 1 >= config.HISTORY_KEYFRAME_EVERY:
+            entry.update(kind="full", data=_pack(list(lines)))
+        else:
+            prev = idx["latest"][1] if idx["latest"] and idx["latest"][0] == v - 1 else _rebuild(idx, v - 1)
+            entry.update(kind="delta", data=_pack(_make_delta(prev, list(lines))))
+
+        os.makedirs(HISTORY_DIR, exist_ok=True)
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with open(_log_path(key), "a", encoding="utf-8") as f:
+            f.write(line)
+        entries.append(entry)
+        idx["by_sha"].setdefault(sha, v)
+        idx["size"] += len(line.encode("utf-8"))
+        idx["latest"] = (v, list(lines))
+        return v
+
+
+def list_versions(key):
+    """Version metadata (no payloads), oldest first."""
+    with _lock:
+        idx = _load_index(key)
+        return [{k: e[k] for k in ("v", "ts", "sha", "kind")} for e in idx["entries"]]
+
+
+def get_version(key, v):
+    """Rebuild version v of key; None if it does not exist."""
+    with _lock:
+        idx = _load_index(key)
+        if not 0 <= v < len(idx["entries"]):
+            return None
+        return _rebuild(idx, v)
+
+
+def iter_versions(key, start=0, end=None):
+    """Yield (entry_meta, lines) for versions [start, end), rebuilding incrementally."""
+    with _lock:
+        entries = list(_load_index(key)["entries"])
+    end = len(entries) if end is None else min(end, len(entries))
+    lines = None
+    for v in range(start, end):
+        e = entries[v]
+        if lines is None or e["kind"] != "delta":
+            lines = get_version(key, v)
+        else:
+            lines = _apply_delta(lines, _unpack(e["data"]))
+        yield {k: e[k] for k in ("v", "ts", "sha", "kind")}, lines
+
+
+def version_at(key, ts):
+    """Latest version recorded at or before ISO timestamp ts (None if none)."""
+    target = _parse_ts(ts)
+    found = None
+    for meta in list_versions(key):
+        if _parse_ts(meta["ts"]) <= target:
+            found = meta["v"]
+        else:
+            break
+    return found
+
+
+def diff_versions(key, v_from, v_to):
+    """Lines added / removed going from version v_from to v_to (either may be None = empty)."""
+    old = get_version(key, v_from) if v_from is not None else []
+    new = get_version(key, v_to) if v_to is not None else []
+    old_set, new_set = set(old or []), set(new or [])
+    return {
+        "added": [l for l in (new or []) if l not in old_set],
+        "removed": [l for l in (old or []) if l not in new_set],
+    }
+
+
+def delete_history(key):
+    """Remove the history log for key. Returns True if a log was deleted."""
+    with _lock:
+        _index.pop(key, None)
+        path = _log_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+            return True
+        return False
+
+
+def _parse_ts(ts):
+    txt = ts.strip()
+    if txt.endswith("Z"):
+        txt = txt[:-1] + "+00:00"
+    dt = datetime.fromisoformat(txt)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
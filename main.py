@@ -5,16 +5,25 @@ Run a competitor monitoring pass.
 - compute diffs vs snapshot
 - summarize (Groq or fallback)
 - send Slack
+
+CLI:
+  python main.py                     one live monitoring pass
+  python main.py replay [--dry-run]  rebuild events from archived pages (see replay.py)
 """
 
 import os
+import threading
 from urllib.parse import urlparse
 
 import config
-from scraper import fetch_changelog
+from crawler import (chrome_key, competitor_sources, crawl_competitor, entry_texts, is_paginated,
+                     merge_snapshot)
 from diff_detector import load_snapshot, save_snapshot, compute_diff
+from history import record_version
 from summarizer import summarize_all
 from reporter import send_slack
+from replay import archive_run
+import push
 
 
 # --- NSFW guard -------------------------------------------------------------
@@ -34,8 +43,10 @@ def get_valid_competitors():
     valid = []
     removed = []
     for comp in config.COMPETITORS:
-        url = comp.get("changelog") or ""
-        if is_nsfw_url(url):
+        urls = [comp.get("changelog") or ""]
+        if comp.get("sources"):
+            urls += [s["url"] for s in competitor_sources(comp)]
+        if any(is_nsfw_url(url) for url in urls):
             removed.append(comp)
             continue
         valid.append(comp)
@@ -45,6 +56,40 @@ def get_valid_competitors():
     return valid
 
 
+# --- Snapshot + diff --------------------------------------------------------
+_snapshot_lock = threading.Lock()  # polling and push ingest may touch the same competitor
+
+
+def ingest_lines(name, new, old=None, merge=False):
+    """
+    Diff freshly extracted lines against the stored snapshot, then persist the
+    new snapshot (+ history version). Returns the list of new lines.
+    merge=True keeps previously known lines that are absent from `new`
+    (partial content: deep pagination, pushed feed fragments).
+    """
+    with _snapshot_lock:
+        if old is None:
+            old = load_snapshot(name)
+        diff = compute_diff(old, new)
+        if merge:
+            new = merge_snapshot(old, new)
+        save_snapshot(name, new)
+        record_version(name, new)
+    return diff
+
+
+def unseen_lines(lines, key):
+    """
+    Drop lines whose entry text is already in snapshot `key`. Pushed entries and
+    polled pages live in separate snapshots; this keeps one channel from
+    re-reporting what the other already delivered.
+    """
+    known = entry_texts(load_snapshot(key))
+    if not known:
+        return lines
+    return [l for l in lines if entry_texts([l]).isdisjoint(known)]
+
+
 # --- Core runner ------------------------------------------------------------
 def run(return_changes: bool = False):
     """
@@ -59,29 +104,60 @@ def run(return_changes: bool = False):
         return
 
     all_changes = {}
+    fetch_stats = {"fetches": 0, "shared": 0, "cached": 0}
+    total_pages = 0
+    push_skipped = 0
 
     for comp in comps:
         name = comp["name"]
-        url = comp["changelog"]
-        print(f"[INFO] Checking {name}: {url}")
+        subscribed = push.is_subscribed(name)
+        if subscribed and not push.poll_due(name):
+            # push-fed source: polling is only a slow safety net
+            print(f"[INFO] Skipping {name}: receiving push updates (safety poll not due).")
+            push_skipped += 1
+            continue
+        sources = competitor_sources(comp)
+        print(f"[INFO] Checking {name}: " + ", ".join(s["url"] for s in sources))
 
-        raw = fetch_changelog(url)
-        if raw is None:
+        # snapshot + crawl (paginated sources stop at already-known entries)
+        old = load_snapshot(name)
+        raw_pages = [] if config.ARCHIVE_RAW_PAGES else None
+        chrome = load_snapshot(chrome_key(name)) or {}
+        failed = []
+        new, pages = crawl_competitor(comp, old, stats=fetch_stats, raw_pages=raw_pages,
+                                      chrome=chrome, failed=failed)
+        total_pages += pages
+        if is_paginated(comp):
+            save_snapshot(chrome_key(name), chrome)
+        if new is None:
             print(f"[Skipped] Could not fetch changelog for {name}.")
             continue
+        if len(sources) > 1 or pages > 1:
+            print(f"[INFO] {name}: {pages} page(s) from {len(sources)} source(s).")
 
-        # snapshot + diff
-        old = load_snapshot(name)
-        new = raw.splitlines()
-        diff = compute_diff(old, new)
+        if raw_pages:
+            archive_run(name, raw_pages)  # per source + page, so replay sees what this run saw
 
+        if failed:
+            print(f"[WARN] {name}: no content from " + ", ".join(failed) + "; keeping its known entries.")
+        # partial run (deep pages not re-fetched, or a source failed): keep what we knew
+        diff = ingest_lines(name, new, old=old, merge=is_paginated(comp) or bool(failed))
+        diff = unseen_lines(diff, push.snapshot_key(name))  # already delivered by push
         if diff:
             print(f"[INFO] {len(diff)} new line(s) for {name}.")
             all_changes[name] = diff
         else:
             print(f"[INFO] No new lines for {name}.")
+        if subscribed:
+            push.record_poll(name)
 
-        save_snapshot(name, new)
+    avoided = fetch_stats["shared"] + fetch_stats["cached"]
+    print(f"[INFO] Pages requested: {total_pages}. Fetches: {fetch_stats['fetches']} made, "
+          f"{avoided} duplicate(s) avoided ({fetch_stats['shared']} shared in-flight, "
+          f"{fetch_stats['cached']} from cache).")
+    if push_skipped:
+        push.record_fetches_avoided(push_skipped)
+        print(f"[INFO] {push_skipped} push-subscribed competitor(s) not polled.")
 
     # Summarize + notify
     if all_changes or config.ALWAYS_NOTIFY:
@@ -95,3 +171,36 @@ def run(return_changes: bool = False):
 
     if return_changes:
         return all_changes
+
+
+# --- CLI --------------------------------------------------------------------
+def _parse_args(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Competitor Monitor")
+    sub = parser.add_subparsers(dest="command")
+
+    rp = sub.add_parser("replay", help="reprocess archived pages offline")
+    rp.add_argument("--source", choices=["archive", "history"], default="archive",
+                    help="raw page archive (default) or versioned snapshot history")
+    rp.add_argument("--workers", type=int, default=None, help="process count (default: all cores)")
+    rp.add_argument("--competitor", default=None, help="only replay this competitor")
+    rp.add_argument("--batch-size", type=int, default=200, help="pages per worker task")
+    rp.add_argument("--resume", action="store_true", help="continue from the last checkpoint")
+    rp.add_argument("--dry-run", action="store_true", help="skip LLM summary and Slack")
+    rp.add_argument("--out", default=None, help="events NDJSON path (default data/replay/events.jsonl)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    if args.command == "replay":
+        from replay import replay
+        try:
+            replay(source=args.source, workers=args.workers, dry_run=args.dry_run,
+                   resume=args.resume, competitor=args.competitor,
+                   batch_size=args.batch_size, out=args.out)
+        except ValueError as e:
+            raise SystemExit(f"[REPLAY][ERROR] {e}")
+    else:
+        run()
@@ -0,0 +1,425 @@
+# push.py
+"""
+Push ingestion: WebSub subscriptions + GitHub release webhooks.
+
+Sources that can push (feeds advertising a WebSub hub, GitHub repos with a
+release webhook) deliver new content to POST /api/ingest/<token> instead of
+waiting for the hourly poll. The token is random and stored with the
+subscription, so callbacks survive competitor renumbering, renames and
+restarts. Once a competitor has a verified subscription, main.run only polls
+it every config.PUSH_SAFETY_POLL_HOURS as a safety net.
+
+Pushed entries are diffed against their own snapshot (snapshot_key), not the
+polled page: feed entries and page markup are different line sets, and the
+safety poll replaces the page snapshot wholesale.
+
+State lives in data/subscriptions.json, keyed by competitor name:
+    {"mode": "websub" | "github", "state": "pending" | "verified",
+     "token", "hub", "topic", "callback", "secret", "expiresAt", "lastPoll", "lastPush"}
+
+Kept free of Flask / main imports so both the CLI and server can use it.
+"""
+
+import hashlib
+import hmac
+import html
+import json
+import os
+import re
+import secrets
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+import feedparser
+import requests
+
+import config
+from scraper import extract_lines, fetch_changelog
+
+SUBSCRIPTIONS_PATH = "data/subscriptions.json"
+DEFAULT_LEASE_SECONDS = 10 * 24 * 3600
+
+_lock = threading.Lock()
+_stats = {"received": 0, "rejected": 0, "newLines": 0, "fetchesAvoided": 0,
+          "latencySamples": 0, "latencyTotalSec": 0.0}
+
+_HUB_LINK_RE = re.compile(r"<(?:link|atom:link)\b[^>]*\brel=[\"']hub[\"'][^>]*>", re.IGNORECASE)
+_HREF_RE = re.compile(r"\bhref=[\"']([^\"']+)[\"']", re.IGNORECASE)
+_BREAK_TAG_RE = re.compile(r"<(?:br|/?(?:p|div|li|ul|ol|h[1-6]|tr|pre|blockquote))\b[^>]*>", re.IGNORECASE)
+_TAG_RE = re.compile(r"<[^>]*>")
+
+
+# --- Time helpers -----------------------------------------------------------
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+def _iso(dt):
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def _parse_time(txt):
+    """ISO8601 / RFC822 → aware UTC datetime, or None."""
+    txt = (txt or "").strip()
+    if not txt:
+        return None
+    try:
+        dt = datetime.fromisoformat(txt[:-1] + "+00:00" if txt.endswith("Z") else txt)
+    except ValueError:
+        try:
+            dt = parsedate_to_datetime(txt)
+        except (TypeError, ValueError):
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+# --- Subscription store -----------------------------------------------------
+def _load():
+    if not os.path.exists(SUBSCRIPTIONS_PATH):
+        return {}
+    try:
+        with open(SUBSCRIPTIONS_PATH) as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[WARN] Could not read {SUBSCRIPTIONS_PATH}: {e}")
+        return {}
+
+
+def _save(subs):
+    os.makedirs(os.path.dirname(SUBSCRIPTIONS_PATH), exist_ok=True)
+    tmp = SUBSCRIPTIONS_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(subs, f, indent=2)
+    os.replace(tmp, SUBSCRIPTIONS_PATH)
+
+
+def _update(name, **fields):
+    with _lock:
+        subs = _load()
+        if name in subs:
+            subs[name].update(fields)
+            _save(subs)
+
+
+def snapshot_key(name):
+    """Snapshot / history key for a competitor's pushed entries."""
+    return f"{name}.push"
+
+
+def get_subscription(name):
+    with _lock:
+        return _load().get(name)
+
+
+def find_by_token(token):
+    """Competitor name whose subscription owns callback `token`, or None."""
+    if not token:
+        return None
+    with _lock:
+        subs = _load()
+    return next((name for name, sub in subs.items()
+                 if hmac.compare_digest(sub.get("token") or "", token)), None)
+
+
+def _new_token():
+    return secrets.token_urlsafe(16)
+
+
+def list_subscriptions(redact=True):
+    with _lock:
+        subs = _load()
+    if redact:
+        subs = {k: {**v, "secret": bool(v.get("secret"))} for k, v in subs.items()}
+    return subs
+
+
+def _active(sub):
+    if not sub or sub.get("state") != "verified":
+        return False
+    expires = _parse_time(sub.get("expiresAt"))
+    return expires is None or expires > _utcnow()
+
+
+def is_subscribed(name):
+    """True if pushes are currently expected for this competitor."""
+    return _active(get_subscription(name))
+
+
+def poll_due(name):
+    """Safety-net poll: due if never polled or last poll older than PUSH_SAFETY_POLL_HOURS."""
+    sub = get_subscription(name)
+    last = _parse_time((sub or {}).get("lastPoll"))
+    return last is None or _utcnow() - last >= timedelta(hours=config.PUSH_SAFETY_POLL_HOURS)
+
+
+def record_poll(name):
+    _update(name, lastPoll=_iso(_utcnow()))
+
+
+def rename(old_name, new_name):
+    with _lock:
+        subs = _load()
+        if old_name in subs and old_name != new_name:
+            subs[new_name] = subs.pop(old_name)
+            _save(subs)
+
+
+def remove(name):
+    with _lock:
+        subs = _load()
+        if subs.pop(name, None) is not None:
+            _save(subs)
+            return True
+        return False
+
+
+# --- WebSub -----------------------------------------------------------------
+def discover_hub(topic_url):
+    """Find a WebSub hub advertised by the topic (feed/page <link rel="hub">)."""
+    raw = fetch_changelog(topic_url)
+    if not raw:
+        return None
+    for tag in _HUB_LINK_RE.findall(raw):
+        m = _HREF_RE.search(tag)
+        if m:
+            return m.group(1)
+    return None
+
+
+def _hub_request(mode, hub, topic, callback, secret=None, lease=DEFAULT_LEASE_SECONDS):
+    form = {"hub.mode": mode, "hub.topic": topic, "hub.callback": callback}
+    if mode == "subscribe":
+        form["hub.lease_seconds"] = str(lease)
+        if secret:
+            form["hub.secret"] = secret
+    try:
+        resp = requests.post(hub, data=form, timeout=15)
+    except requests.exceptions.RequestException as e:
+        return False, str(e)
+    if resp.status_code not in (202, 204):
+        return False, f"hub returned {resp.status_code}: {resp.text[:200]}"
+    return True, None
+
+
+def subscribe_websub(name, topic, callback_base, hub=None, lease=DEFAULT_LEASE_SECONDS):
+    """
+    Ask the hub to push `topic` to <callback_base>/<token>. The hub then
+    verifies intent via GET callback (see verify_intent). Returns (subscription, error).
+    """
+    hub = hub or discover_hub(topic)
+    if not hub:
+        return None, "no WebSub hub advertised by topic; pass hub explicitly"
+
+    secret = secrets.token_hex(20)
+    token = _new_token()
+    callback = f"{callback_base.rstrip('/')}/{token}"
+    sub = {"mode": "websub", "state": "pending", "token": token, "hub": hub, "topic": topic,
+           "callback": callback, "secret": secret, "leaseSeconds": lease,
+           "expiresAt": None, "lastPoll": None, "lastPush": None,
+           "createdAt": _iso(_utcnow())}
+    with _lock:
+        subs = _load()
+        subs[name] = sub
+        _save(subs)
+
+    ok, err = _hub_request("subscribe", hub, topic, callback, secret, lease)
+    if not ok:
+        remove(name)
+        return None, err
+    return sub, None
+
+
+def unsubscribe(name):
+    """
+    Unsubscribe from the hub (WebSub) or drop a GitHub webhook record.
+    WebSub records are removed once the hub verifies the unsubscribe (or at
+    once if the hub request fails). Returns error or None.
+    """
+    sub = get_subscription(name)
+    if not sub:
+        return "not subscribed"
+    if sub["mode"] == "websub":
+        _update(name, state="unsubscribing")
+        ok, err = _hub_request("unsubscribe", sub["hub"], sub["topic"], sub["callback"])
+        if ok:
+            return None
+        print(f"[WARN] Hub unsubscribe failed for {name}: {err}")
+    remove(name)
+    return None
+
+
+def verify_intent(name, mode, topic, challenge, lease_seconds=None):
+    """
+    Handle the hub's GET verification. Returns the challenge to echo, or None
+    if the request does not match a subscription we asked for.
+    """
+    sub = get_subscription(name)
+    if not sub or sub.get("mode") != "websub" or not challenge or topic != sub.get("topic"):
+        return None
+    if mode == "subscribe" and sub.get("state") in ("pending", "verified"):
+        try:
+            lease = int(lease_seconds or sub.get("leaseSeconds") or DEFAULT_LEASE_SECONDS)
+        except ValueError:
+            lease = DEFAULT_LEASE_SECONDS
+        _update(name, state="verified", expiresAt=_iso(_utcnow() + timedelta(seconds=lease)))
+        return challenge
+    if mode == "unsubscribe" and sub.get("state") == "unsubscribing":
+        remove(name)
+        return challenge
+    return None
+
+
+def renew_expiring(within_hours=24):
+    """Re-subscribe WebSub leases that expire soon. Returns count renewed."""
+    renewed = 0
+    horizon = _utcnow() + timedelta(hours=within_hours)
+    for name, sub in list_subscriptions(redact=False).items():
+        expires = _parse_time(sub.get("expiresAt"))
+        if sub.get("mode") != "websub" or expires is None or expires > horizon:
+            continue
+        ok, err = _hub_request("subscribe", sub["hub"], sub["topic"], sub["callback"],
+                               sub.get("secret"), sub.get("leaseSeconds", DEFAULT_LEASE_SECONDS))
+        if ok:
+            renewed += 1
+        else:
+            print(f"[WARN] WebSub renewal failed for {name}: {err}")
+    return renewed
+
+
+# --- GitHub webhooks --------------------------------------------------------
+def register_github(name, callback_base):
+    """
+    Create a GitHub webhook subscription. GitHub has no intent handshake: the
+    returned secret + callback are entered in the repo's webhook settings
+    (content type application/json, "Releases" events). The record stays
+    "pending" (competitor still polled hourly) until confirm_github sees the
+    first correctly signed delivery.
+    """
+    token = _new_token()
+    sub = {"mode": "github", "state": "pending", "token": token, "hub": None, "topic": None,
+           "callback": f"{callback_base.rstrip('/')}/{token}", "secret": secrets.token_hex(20),
+           "expiresAt": None,
+           "lastPoll": None, "lastPush": None, "createdAt": _iso(_utcnow())}
+    with _lock:
+        subs = _load()
+        subs[name] = sub
+        _save(subs)
+    return sub
+
+
+def confirm_github(name, event):
+    """
+    Mark a pending GitHub subscription verified. Call only after the delivery's
+    signature checked out; GitHub sends a "ping" as soon as the hook is saved.
+    Returns True if the state changed.
+    """
+    sub = get_subscription(name)
+    if not sub or sub.get("mode") != "github" or sub.get("state") != "pending":
+        return False
+    if event not in ("ping", "release"):
+        return False
+    _update(name, state="verified")
+    return True
+
+
+# --- Delivery ---------------------------------------------------------------
+def verify_signature(sub, body, headers):
+    """
+    HMAC check for a push body. Accepts GitHub's X-Hub-Signature-256 and
+    WebSub's X-Hub-Signature (sha1/sha256/sha384/sha512).
+    """
+    secret = (sub or {}).get("secret")
+    if not secret:
+        return False
+    header = headers.get("X-Hub-Signature-256") or headers.get("X-Hub-Signature") or ""
+    algo, _, sent = header.partition("=")
+    if algo not in ("sha1", "sha256", "sha384", "sha512") or not sent:
+        return False
+    expected = hmac.new(secret.encode(), body, getattr(hashlib, algo)).hexdigest()
+    return hmac.compare_digest(expected, sent.strip().lower())
+
+
+def parse_delivery(sub, body, headers):
+    """
+    Push body → (lines, published_at or None).
+    GitHub: release payload → release title + notes. WebSub: feed content.
+    """
+    if sub.get("mode") == "github":
+        if headers.get("X-GitHub-Event", "release") != "release":
+            return [], None  # ping / unrelated events
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return [], None
+        release = payload.get("release") or {}
+        if payload.get("action") not in (None, "published", "released", "created", "edited"):
+            return [], None
+        title = release.get("name") or release.get("tag_name") or ""
+        lines = ([title] if title else []) + extract_lines(release.get("body") or "")
+        published = _parse_time(release.get("published_at") or release.get("created_at"))
+        return [l for l in lines if l.strip()], published
+
+    feed = feedparser.parse(body)
+    if not feed.entries:
+        # fat ping of a non-feed topic: treat like a fetched page
+        return extract_lines(body.decode("utf-8", errors="replace")), None
+    lines, stamps = [], []
+    for entry in feed.entries:
+        lines.extend(_entry_lines(entry))
+        stamp = _parse_time(entry.get("published") or entry.get("updated"))
+        if stamp:
+            stamps.append(stamp)
+    return lines, (max(stamps) if stamps else None)
+
+
+def _text_lines(markup):
+    """HTML fragment → visible text lines."""
+    text = html.unescape(_TAG_RE.sub("", _BREAK_TAG_RE.sub("\n", markup or "")))
+    return [l for l in (" ".join(l.split()) for l in text.splitlines()) if l]
+
+
+def _entry_lines(entry):
+    """Title + body text of one feed entry (content preferred over summary)."""
+    title = " ".join((entry.get("title") or "").split())
+    content = entry.get("content") or []
+    body = content[0].get("value") if content else entry.get("summary")
+    lines = ([title] if title else []) + _text_lines(body)
+    return list(dict.fromkeys(lines))
+
+
+def record_push(name, new_lines, published=None, received_at=None):
+    """Update per-subscription and global push stats; returns detection latency (sec) or None."""
+    received_at = received_at or _utcnow()
+    latency = None
+    with _lock:
+        _stats["received"] += 1
+        _stats["newLines"] += new_lines
+        if published is not None and published <= received_at:
+            latency = (received_at - published).total_seconds()
+            _stats["latencySamples"] += 1
+            _stats["latencyTotalSec"] += latency
+    _update(name, lastPush=_iso(received_at))
+    return latency
+
+
+def record_rejected():
+    with _lock:
+        _stats["rejected"] += 1
+
+
+def record_fetches_avoided(n):
+    with _lock:
+        _stats["fetchesAvoided"] += n
+
+
+def push_stats():
+    with _lock:
+        out = dict(_stats)
+    samples = out.pop("latencySamples")
+    total = out.pop("latencyTotalSec")
+    out["avgDetectionLatencySec"] = round(total / samples, 3) if samples else None
+    out["subscriptions"] = sum(1 for s in list_subscriptions().values() if _active(s))
+    return out
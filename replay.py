@@ -0,0 +1,348 @@
+# replay.py
+"""
+Offline replay / backfill.
+
+Streams archived pages through extract → diff → classify (→ summarize) so
+change events and analytics can be rebuilt after extraction or diff rules
+change, without touching live URLs or the latest snapshots.
+
+Sources
+-------
+archive : raw pages under data/archive/<competitor>/, one entry per run,
+          ordered by name: <stamp>/ holds that run's pages in crawl order
+          (<source>-<page>.html); a bare <stamp>.html is a single-page run.
+          main.run writes these when config.ARCHIVE_RAW_PAGES is on.
+history : versioned snapshots from history.py
+
+Each competitor's runs are cut into batches. A batch only needs the run
+*before* it to diff its first run, so batches run independently in a process
+pool. Paginated competitors are the exception: like main.ingest_lines, each
+run is diffed against the merged snapshot of every earlier run (a run may
+stop after fewer pages than the last one). Their batches run one after the
+other, each starting from the merged snapshot the previous batch returned,
+while other competitors' batches fill the remaining workers.
+
+Results are written per competitor in run order. The checkpoint records, per
+competitor, the last run written (archive run name or history version) and,
+for merged competitors, the merged snapshot after it, so --resume picks up
+runs archived since and does not depend on the batch size.
+"""
+
+import bisect
+import json
+import os
+import queue
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+from multiprocessing import Pool
+
+import config
+import history
+from classifier import classify
+from crawler import is_paginated, merge_snapshot
+from diff_detector import compute_diff
+from scraper import extract_lines
+
+ARCHIVE_DIR = "data/archive/"
+REPLAY_DIR = "data/replay/"
+
+BATCH_SIZE = 200           # pages per worker task
+SUMMARY_TAIL = 50          # recent change lines kept per competitor for the LLM summary
+
+
+# --- Archive ----------------------------------------------------------------
+def _safe_name(name):
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "competitor"
+
+
+def archive_run(name, pages, when=None):
+    """
+    Store one run's raw fetches for later replay.
+    pages: [(source_index, page_index, raw), ...] in crawl order.
+    Returns the run folder.
+    """
+    when = when or datetime.now(timezone.utc)
+    folder = os.path.join(ARCHIVE_DIR, _safe_name(name), when.strftime("%Y%m%dT%H%M%S%fZ"))
+    os.makedirs(folder, exist_ok=True)
+    for source, page, raw in pages:
+        with open(os.path.join(folder, f"{source:03d}-{page:03d}.html"), "w", encoding="utf-8") as f:
+            f.write(raw)
+    return folder
+
+
+def _archive_competitors():
+    """Map archive folder → competitor display name (falls back to folder name)."""
+    names = {_safe_name(c["name"]): c["name"] for c in config.COMPETITORS}
+    if not os.path.isdir(ARCHIVE_DIR):
+        return {}
+    return {d: names.get(d, d) for d in sorted(os.listdir(ARCHIVE_DIR))
+            if os.path.isdir(os.path.join(ARCHIVE_DIR, d))}
+
+
+def _archive_runs(folder):
+    path = os.path.join(ARCHIVE_DIR, folder)
+    return [os.path.join(path, f) for f in sorted(os.listdir(path))]
+
+
+def _merges(name):
+    """True if live runs merge this competitor's snapshots (paginated sources)."""
+    comp = next((c for c in config.COMPETITORS if c["name"] == name), None)
+    return bool(comp) and is_paginated(comp)
+
+
+def _page_time(path):
+    stamp = os.path.splitext(os.path.basename(path.rstrip(os.sep)))[0]
+    try:
+        dt = datetime.strptime(stamp, "%Y%m%dT%H%M%S%fZ").replace(tzinfo=timezone.utc)
+    except ValueError:
+        dt = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc)
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def _read(path):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def _run_lines(path):
+    """Lines of one archived run, combined across pages like crawler.crawl_source."""
+    if not os.path.isdir(path):
+        return extract_lines(_read(path))
+    lines, seen = [], set()
+    for page in sorted(os.listdir(path)):
+        page_lines = extract_lines(_read(os.path.join(path, page)))
+        lines.extend(l for l in page_lines if l not in seen)
+        seen.update(page_lines)
+    return lines
+
+
+# --- Worker -----------------------------------------------------------------
+def _ordered_diff(old, new):
+    added = set(compute_diff(old, new))
+    return [l for l in dict.fromkeys(new) if l in added]
+
+
+def _iter_batch_pages(task):
+    """Yield (timestamp, lines) for the runs of one batch, plus the run before it."""
+    if task["source"] == "archive":
+        if task.get("state") is not None:
+            yield None, task["state"]  # merged snapshot of every earlier run
+        else:
+            yield None, _run_lines(task["prev"]) if task["prev"] else []
+        for path in task["items"]:
+            yield _page_time(path), _run_lines(path)
+    else:
+        start, end = task["items"]
+        first = max(start - 1, 0)
+        it = history.iter_versions(task["key"], first, end)
+        if start == 0:
+            yield None, []
+        for meta, lines in it:
+            # re-run extraction so rule changes apply to stored snapshots too
+            yield meta["ts"], extract_lines("\n".join(lines))
+
+
+def _process_batch(task):
+    """
+    Extract → diff → classify one batch. Runs in a worker process.
+    Returns (name, batch, pages, events, last run, merged snapshot or None).
+    """
+    events = []
+    pages = 0
+    prev, tail = None, 0
+    for ts, lines in _iter_batch_pages(task):
+        if prev is None:
+            prev = lines
+            continue
+        pages += 1
+        for line in _ordered_diff(prev, lines):
+            category, score = classify(line)
+            events.append({
+                "competitor": task["name"],
+                "timestamp": ts,
+                "summary": (line[:100] + "...") if len(line) > 100 else line,
+                "changes": [line],
+                "type": "replay",
+                "category": category,
+                "score": score,
+            })
+        if task.get("merge"):
+            prev = merge_snapshot(prev, lines, tail=tail)
+            tail = len(prev) - len(lines)  # already filtered: skipped by the next merge
+        else:
+            prev = lines
+    if task["source"] == "archive":
+        last = os.path.basename(task["items"][-1])
+    else:
+        last = task["items"][1] - 1
+    return task["name"], task["batch"], pages, events, last, (prev if task.get("merge") else None)
+
+
+# --- Planning / checkpoint --------------------------------------------------
+def _plan(source, only=None, batch_size=BATCH_SIZE, done=None, merged=None):
+    """
+    Build the ordered task list: competitors in order, batches in order.
+    done: last run already written per competitor (checkpoint); merged: the
+    merged snapshot after it, for competitors whose runs are merged.
+    """
+    done, merged = done or {}, merged or {}
+    tasks = []
+    if source == "archive":
+        for folder, name in _archive_competitors().items():
+            if only and name != only:
+                continue
+            runs = _archive_runs(folder)
+            first = 0
+            if name in done:
+                first = bisect.bisect_right([os.path.basename(r) for r in runs], done[name])
+            merge = _merges(name)
+            for b, i in enumerate(range(first, len(runs), batch_size)):
+                tasks.append({"source": source, "name": name, "batch": b, "merge": merge,
+                              "prev": runs[i - 1] if i else None,
+                              "state": merged.get(name) if merge and i == first else None,
+                              "items": runs[i:i + batch_size]})
+    else:
+        for comp in config.COMPETITORS:
+            name = comp["name"]
+            if only and name != only:
+                continue
+            n = len(history.list_versions(name))
+            for b, i in enumerate(range(done.get(name, -1) + 1, n, batch_size)):
+                tasks.append({"source": source, "name": name, "key": name, "batch": b,
+                              "merge": False, "items": (i, min(i + batch_size, n))})
+    return tasks
+
+
+def _run_ordered(pool, tasks, window):
+    """
+    Run batch tasks on the pool; yield results per competitor in batch order.
+    Up to `window` batches are in flight. A merged competitor's next batch is
+    submitted (ahead of the queue) once the previous one returned its merged
+    snapshot; all other batches are independent.
+    """
+    results = queue.SimpleQueue()
+    ready, waiting = deque(), {}
+    for task in tasks:
+        if task["merge"] and task["batch"] > 0:
+            waiting.setdefault(task["name"], deque()).append(task)
+        else:
+            ready.append(task)
+    expected, held, in_flight = {}, {}, 0
+
+    while ready or in_flight:
+        while ready and in_flight < window:
+            pool.apply_async(_process_batch, (ready.popleft(),),
+                             callback=results.put, error_callback=results.put)
+            in_flight += 1
+        result = results.get()
+        in_flight -= 1
+        if isinstance(result, BaseException):
+            raise result
+        name = result[0]
+        held[(name, result[1])] = result
+        while (name, expected.get(name, 0)) in held:
+            result = held.pop((name, expected.get(name, 0)))
+            expected[name] = expected.get(name, 0) + 1
+            if waiting.get(name):
+                # a copy, so the plan does not keep every merged snapshot alive
+                task = dict(waiting[name].popleft(), state=result[5])
+                ready.appendleft(task)  # the sequential chain is the critical path
+            yield result
+
+
+def _new_checkpoint(source):
+    return {"source": source, "done": {}, "merged": {}, "next_id": 1, "pages": 0, "analytics": {}}
+
+
+def _load_checkpoint(path, source):
+    if not os.path.exists(path):
+        return _new_checkpoint(source)
+    with open(path) as f:
+        state = json.load(f)
+    if state.get("source") != source:
+        raise ValueError(f"{path} was not written by a --source {source} replay; "
+                         "run without --resume to start over")
+    return state
+
+
+def _save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+# --- Entry point ------------------------------------------------------------
+def replay(source="archive", workers=None, dry_run=False, resume=False,
+           competitor=None, batch_size=BATCH_SIZE, out=None):
+    """
+    Rebuild change events + analytics from archived pages.
+    Events → <REPLAY_DIR>/events.jsonl, analytics → <REPLAY_DIR>/analytics.json.
+    dry_run skips the LLM summary and Slack.
+    Returns stats dict {pages, events, seconds, pagesPerSec}.
+    """
+    os.makedirs(REPLAY_DIR, exist_ok=True)
+    out = out or os.path.join(REPLAY_DIR, "events.jsonl")
+    ckpt_path = os.path.join(REPLAY_DIR, "checkpoint.json")
+
+    if resume:
+        state = _load_checkpoint(ckpt_path, source)
+    else:
+        state = _new_checkpoint(source)
+        open(out, "w").close()
+
+    tasks = _plan(source, competitor, batch_size, state["done"], state["merged"])
+    workers = workers or os.cpu_count() or 1
+    print(f"[REPLAY] {len(tasks)} batch(es) from '{source}' on {workers} worker(s)"
+          + (" [dry-run]" if dry_run else ""))
+
+    tails = {}
+    pages = events = 0
+    started = last_report = time.perf_counter()
+
+    with Pool(workers) as pool, open(out, "a", encoding="utf-8") as fh:
+        for name, _batch, n_pages, batch_events, last, merged in _run_ordered(pool, tasks, workers * 2):
+            counts = state["analytics"].setdefault(name, {})
+            for ev in batch_events:
+                ev["id"] = state["next_id"]
+                state["next_id"] += 1
+                fh.write(json.dumps(ev) + "\n")
+                counts[ev["category"]] = counts.get(ev["category"], 0) + 1
+                if not dry_run:
+                    tails.setdefault(name, deque(maxlen=SUMMARY_TAIL)).append(ev["changes"][0])
+            fh.flush()
+
+            pages += n_pages
+            events += len(batch_events)
+            state["pages"] += n_pages
+            state["done"][name] = last
+            if merged is not None:
+                state["merged"][name] = merged
+            _save_checkpoint(ckpt_path, state)
+
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                print(f"[REPLAY] {pages} page(s), {events} event(s), "
+                      f"{pages / (now - started):.0f} pages/sec")
+                last_report = now
+
+    elapsed = time.perf_counter() - started
+    rate = pages / elapsed if elapsed else 0.0
+    with open(os.path.join(REPLAY_DIR, "analytics.json"), "w") as f:
+        json.dump({"competitorActivity": state["analytics"], "pages": state["pages"]}, f, indent=2)
+    print(f"[REPLAY] Done: {pages} page(s), {events} event(s) in {elapsed:.1f}s "
+          f"({rate:.0f} pages/sec). Events → {out}")
+
+    if not dry_run and tails:
+        # imported lazily so dry runs never touch the LLM / Slack clients
+        from summarizer import summarize_all
+        from reporter import send_slack
+        summary = summarize_all({k: list(v) for k, v in tails.items()})
+        if config.SLACK_WEBHOOK:
+            send_slack("[Replay] " + summary, config.SLACK_WEBHOOK)
+        else:
+            print(summary)
+
+    return {"pages": pages, "events": events, "seconds": round(elapsed, 3), "pagesPerSec": round(rate, 1)}
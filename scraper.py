@@ -1,6 +1,25 @@
+import threading
+import time
+
 import requests
 
-def fetch_changelog(url):
+import config
+
+# --- Single-flight fetch layer ---------------------------------------------
+# The hourly job, a manual /api/run-monitor and several competitors sharing one
+# changelog URL can all ask for the same page within minutes. Concurrent calls
+# for a URL share one in-flight request; finished results are reused for
+# FETCH_CACHE_TTL seconds. Only successful fetches are cached. The cache lives
+# in this process: expired pages are dropped whenever a page is stored, and at
+# most _CACHE_MAX pages are kept (oldest dropped first).
+_CACHE_MAX = 256
+_lock = threading.Lock()
+_inflight = {}   # url -> {"done": threading.Event, "text": result}
+_cache = {}      # url -> (fetched_at, text), oldest first
+_stats = {"fetches": 0, "shared": 0, "cached": 0}
+
+
+def _fetch_uncached(url):
     headers = {"User-Agent": "Mozilla/5.0 (Competitor Monitor)"}
     
     try:
@@ -20,3 +39,76 @@ def fetch_changelog(url):
     except requests.exceptions.RequestException as e:
         print(f"[Error] Failed to fetch {url}: {e}")
         return None
+
+
+def _count(stats, key):
+    _stats[key] += 1
+    if stats is not None:
+        stats[key] = stats.get(key, 0) + 1
+
+
+def _store(url, text):
+    """Cache a fetched page; caller holds _lock."""
+    now = time.monotonic()
+    _cache.pop(url, None)  # re-insert so _cache stays in fetch order
+    for key in [k for k, (fetched_at, _) in _cache.items() if now - fetched_at >= config.FETCH_CACHE_TTL]:
+        del _cache[key]
+    while len(_cache) >= _CACHE_MAX:
+        del _cache[next(iter(_cache))]
+    _cache[url] = (now, text)
+
+
+def fetch_changelog(url, stats=None):
+    """
+    Fetch a changelog page, coalescing duplicate requests.
+    stats (optional dict) is incremented with per-caller counts:
+    fetches (real HTTP), shared (joined an in-flight fetch), cached (TTL hit).
+    """
+    with _lock:
+        hit = _cache.get(url)
+        if hit is not None:
+            if time.monotonic() - hit[0] < config.FETCH_CACHE_TTL:
+                _count(stats, "cached")
+                return hit[1]
+            del _cache[url]
+        flight = _inflight.get(url)
+        leader = flight is None
+        if leader:
+            flight = _inflight[url] = {"done": threading.Event(), "text": None}
+            _count(stats, "fetches")
+        else:
+            _count(stats, "shared")
+
+    if not leader:
+        # someone else is fetching this URL: wait and reuse their result (even a failure)
+        flight["done"].wait()
+        return flight["text"]
+
+    try:
+        flight["text"] = _fetch_uncached(url)
+    finally:
+        with _lock:
+            if flight["text"] is not None and config.FETCH_CACHE_TTL > 0:
+                _store(url, flight["text"])
+            del _inflight[url]
+        flight["done"].set()
+    return flight["text"]
+
+
+def extract_lines(raw):
+    """Raw page → lines used for snapshots/diffs (shared by live runs and replay)."""
+    return raw.splitlines()
+
+
+def fetch_stats():
+    """Process-lifetime fetch counters (duplicates avoided = shared + cached)."""
+    with _lock:
+        out = dict(_stats)
+    out["duplicatesAvoided"] = out["shared"] + out["cached"]
+    return out
+
+
+def clear_fetch_cache():
+    """Drop cached pages (in-flight fetches are unaffected). Used by the tests."""
+    with _lock:
+        _cache.clear()
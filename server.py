@@ -16,7 +16,16 @@ GET  /api/competitors         → list
 POST /api/competitors         → add
 PUT  /api/competitors/<id>    → update
 DELETE /api/competitors/<id>  → delete (purge history + snapshot)
+GET  /api/competitors/<id>/history   → stored snapshot versions (metadata)
+GET  /api/competitors/<id>/snapshot  → rebuild a past version (?at=<ts> or ?v=)
+GET  /api/competitors/<id>/diff      → lines added/removed between ?from=&to= timestamps
 GET  /api/changes             → change events (optional ?competitor=&days=)
+GET  /api/export              → stream full change history (NDJSON / CSV, optional gzip)
+GET  /api/subscriptions       → push subscriptions (WebSub / GitHub webhooks)
+POST /api/subscriptions       → subscribe {competitor_id, mode?, hub?, topic?}
+DELETE /api/subscriptions/<id> → unsubscribe
+GET  /api/ingest/<token>      → WebSub intent verification (hub.challenge echo)
+POST /api/ingest/<token>      → signed push delivery → diff/summarize pipeline
 POST /api/run-monitor         → run now, push Slack if configured
 GET  /api/status              → current scheduler / last run metadata
 GET  /api/analytics           → simple chart data
@@ -29,17 +38,23 @@ Background Scheduler
 A daemon thread runs `run_monitoring_job()` hourly using `schedule`
 so the hosted app (Railway) keeps checking even without GitHub Actions.
 (If you prefer Actions-only, disable the thread at bottom.)
+Competitors with a verified push subscription are only polled every
+PUSH_SAFETY_POLL_HOURS as a safety net.
 
 """
 
 from __future__ import annotations
 
+import csv
+import io
 import os
 import threading
 import time
+import zlib
 from typing import Any, Dict, List, Optional
 
-from flask import Flask, jsonify, request, send_from_directory, abort
+from flask import (Flask, Response, jsonify, request, send_from_directory, abort,
+                   stream_with_context)
 from flask_cors import CORS
 
 from datetime import datetime, timedelta, timezone
@@ -48,9 +63,15 @@ import schedule
 
 # Backend imports
 import config
-from main import run  # run(return_changes: bool=False) -> Optional[dict]
+from main import run, ingest_lines, unseen_lines  # run(return_changes: bool=False) -> Optional[dict]
 from summarizer import summarize_all
 from reporter import send_slack  # send_slack(text, webhook_url)
+from classifier import CHANGE_TYPES, classify
+from crawler import chrome_key
+from scraper import fetch_stats
+import history
+import push
+import events
 
 # ---------------------------------------------------------------------------
 # Paths
@@ -173,6 +194,8 @@ def _reassign_ids() -> None:
 
 def _make_change_event(competitor: str, summary: str, change_line: str,
                        event_type: str = "update") -> Dict[str, Any]:
+    # classify at ingest so analytics never has to guess from summary text
+    category, score = classify(change_line)
     return {
         "id": len(MOCK_DATA["recent_changes"]) + 1,
         "competitor": competitor,
@@ -180,22 +203,59 @@ def _make_change_event(competitor: str, summary: str, change_line: str,
         "summary": (summary[:100] + "...") if len(summary) > 100 else summary,
         "changes": [change_line],
         "type": event_type,
+        "category": category,
+        "score": score,
     }
 
+def _cache_change_events(changes: Dict[str, List[str]], event_type: str) -> None:
+    """Persist one change event per new line (events log) and keep the last 100 in memory."""
+    new_events = [
+        _make_change_event(competitor_name, line, line, event_type)
+        for competitor_name, change_list in (changes or {}).items()
+        for line in change_list
+    ]
+    try:
+        events.append_events(new_events)  # assigns persistent ids
+    except Exception as e:
+        print(f"[WARN] Could not persist change events: {e}")
+    MOCK_DATA["recent_changes"].extend(new_events)
+    MOCK_DATA["recent_changes"] = MOCK_DATA["recent_changes"][-100:]
+
 def _purge_competitor_history(name: str) -> int:
     """Remove change events + snapshot file for a competitor. Return count removed."""
     before = len(MOCK_DATA["recent_changes"])
     MOCK_DATA["recent_changes"] = [c for c in MOCK_DATA["recent_changes"] if c["competitor"] != name]
     removed = before - len(MOCK_DATA["recent_changes"])
 
-    # remove snapshot file
-    snap_path = os.path.join(DATA_DIR, f"{name}.json")
-    if os.path.exists(snap_path):
+    # remove snapshot files (polled page, pushed entries, learned page chrome)
+    for key in (name, push.snapshot_key(name), chrome_key(name)):
+        snap_path = os.path.join(DATA_DIR, f"{key}.json")
+        if os.path.exists(snap_path):
+            try:
+                os.remove(snap_path)
+                print(f"[INFO] Deleted snapshot {snap_path}")
+            except Exception as e:
+                print(f"[WARN] Could not delete snapshot {snap_path}: {e}")
+
+    # remove persisted events
+    try:
+        events.delete_competitor_events(name)
+    except Exception as e:
+        print(f"[WARN] Could not purge events log for {name}: {e}")
+
+    # drop push subscription (best effort unsubscribe at the hub)
+    try:
+        push.unsubscribe(name)
+    except Exception as e:
+        print(f"[WARN] Could not unsubscribe {name}: {e}")
+
+    # remove versioned history
+    for key in (name, push.snapshot_key(name)):
         try:
-            os.remove(snap_path)
-            print(f"[INFO] Deleted snapshot {snap_path}")
+            if history.delete_history(key):
+                print(f"[INFO] Deleted snapshot history for {key}")
         except Exception as e:
-            print(f"[WARN] Could not delete snapshot {snap_path}: {e}")
+            print(f"[WARN] Could not delete snapshot history for {key}: {e}")
     return removed
 
 # ---------------------------------------------------------------------------
@@ -291,6 +351,7 @@ def api_update_competitor(competitor_id: int):
     if _is_nsfw_url(new_url):
         return jsonify({"error": "URL blocked by NSFW policy"}), 400
 
+    old_name = comp["name"]
     comp.update({
         "name": new_name,
         "changelog": new_url,
@@ -301,10 +362,15 @@ def api_update_competitor(competitor_id: int):
 
     # sync config list
     for c in config.COMPETITORS:
-        if c["name"] == comp["name"]:
+        if c["name"] == old_name:
+            # keep a declared primary source in step with the edited changelog URL
+            sources = c.get("sources") or []
+            if sources and sources[0].get("url") == c["changelog"]:
+                sources[0]["url"] = new_url
             c["name"] = new_name
             c["changelog"] = new_url
             break
+    push.rename(old_name, new_name)
 
     return jsonify({"success": True, "competitor": comp})
 
@@ -328,6 +394,84 @@ def api_delete_competitor(competitor_id: int):
 
     return jsonify({"success": True, "removed_changes": removed_changes})
 
+# --------------------------- API: Snapshot History ------------------------
+
+def _find_competitor(competitor_id: int) -> Optional[Dict[str, Any]]:
+    return next((c for c in MOCK_DATA["competitors"] if c["id"] == competitor_id), None)
+
+def _version_param(name: str, ts: Optional[datetime]) -> Optional[int]:
+    """Version at/before ts; latest version if ts is None."""
+    if ts is None:
+        versions = history.list_versions(name)
+        return versions[-1]["v"] if versions else None
+    return history.version_at(name, ts.isoformat())
+
+def _timestamp_args(*names: str) -> Dict[str, Optional[datetime]]:
+    """Strictly parse optional ISO timestamp query args; ValueError names the bad one."""
+    out = {}
+    for arg in names:
+        raw = request.args.get(arg) or None
+        try:
+            out[arg] = events.parse_timestamp(raw) if raw else None
+        except ValueError:
+            raise ValueError(f"{arg} must be an ISO timestamp") from None
+    return out
+
+@app.route("/api/competitors/<int:competitor_id>/history", methods=["GET"])
+def api_competitor_history(competitor_id: int):
+    comp = _find_competitor(competitor_id)
+    if not comp:
+        return jsonify({"error": "Competitor not found"}), 404
+    return jsonify({"competitor": comp["name"], "versions": history.list_versions(comp["name"])})
+
+@app.route("/api/competitors/<int:competitor_id>/snapshot", methods=["GET"])
+def api_competitor_snapshot(competitor_id: int):
+    comp = _find_competitor(competitor_id)
+    if not comp:
+        return jsonify({"error": "Competitor not found"}), 404
+
+    v = request.args.get("v")
+    if v is not None:
+        try:
+            v = int(v)
+        except ValueError:
+            return jsonify({"error": "v must be an integer"}), 400
+    else:
+        try:
+            at = _timestamp_args("at")["at"]
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        v = _version_param(comp["name"], at)
+
+    lines = history.get_version(comp["name"], v) if v is not None else None
+    if lines is None:
+        return jsonify({"error": "No snapshot version found"}), 404
+    return jsonify({"competitor": comp["name"], "version": v, "lines": lines})
+
+@app.route("/api/competitors/<int:competitor_id>/diff", methods=["GET"])
+def api_competitor_diff(competitor_id: int):
+    comp = _find_competitor(competitor_id)
+    if not comp:
+        return jsonify({"error": "Competitor not found"}), 404
+
+    try:
+        ts = _timestamp_args("from", "to")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if ts["from"] and ts["to"] and ts["from"] > ts["to"]:
+        return jsonify({"error": "from must not be later than to"}), 400
+
+    name = comp["name"]
+    v_to = _version_param(name, ts["to"])
+    if ts["from"]:
+        v_from = history.version_at(name, ts["from"].isoformat())
+    else:
+        # default: the version just before `to`
+        v_from = v_to - 1 if v_to else None
+
+    out = history.diff_versions(name, v_from, v_to)
+    return jsonify({"competitor": name, "from": v_from, "to": v_to, **out})
+
 # --------------------------- API: Changes ----------------------------------
 
 @app.route("/api/changes", methods=["GET"])
@@ -349,6 +493,215 @@ def api_get_changes():
 
     return jsonify({"changes": out})
 
+# --------------------------- API: Export ----------------------------------
+
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_CSV_FIELDS = ["id", "timestamp", "competitor", "type", "category", "score", "summary", "change"]
+
+def _export_chunks(rows, fmt: str, gzip_out: bool):
+    """Generator: encode event rows as NDJSON/CSV in ~64KB chunks, optionally gzip-streamed."""
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip_out else None
+    buf = io.StringIO() if fmt == "csv" else None
+    writer = csv.writer(buf) if buf is not None else None
+    parts: List[bytes] = []
+    size = 0
+
+    def emit(data: bytes):
+        return gz.compress(data) if gz else data
+
+    if writer:
+        writer.writerow(EXPORT_CSV_FIELDS)
+
+    for _id, raw, ev in rows:
+        if writer:
+            writer.writerow([
+                ev.get("id"), ev.get("timestamp"), ev.get("competitor"), ev.get("type"),
+                ev.get("category"), ev.get("score"), ev.get("summary"),
+                (ev.get("changes") or [""])[0],
+            ])
+            if buf.tell() >= EXPORT_CHUNK_BYTES:
+                out = emit(buf.getvalue().encode("utf-8"))
+                buf.seek(0)
+                buf.truncate()
+                if out:
+                    yield out
+        else:
+            parts.append(raw)
+            size += len(raw)
+            if size >= EXPORT_CHUNK_BYTES:
+                out = emit(b"".join(parts))
+                parts, size = [], 0
+                if out:
+                    yield out
+
+    tail = buf.getvalue().encode("utf-8") if writer else b"".join(parts)
+    out = emit(tail) if tail else b""
+    if gz:
+        out += gz.flush()
+    if out:
+        yield out
+
+@app.route("/api/export", methods=["GET"])
+def api_export():
+    """
+    Stream change history in id (keyset) order.
+    ?format=ndjson|csv  &compress=gzip  &competitor=  &type=<category>
+    &since=<iso>  &until=<iso>  &after=<last id seen>  &limit=<rows>
+    Resume an interrupted export with after=<id of the last row received>.
+    """
+    fmt = request.args.get("format", "ndjson").lower()
+    if fmt not in ("ndjson", "csv"):
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+    gzip_out = request.args.get("compress", "").lower() in ("gzip", "gz", "1", "true")
+
+    try:
+        after = int(request.args.get("after", 0))
+        limit = int(request.args["limit"]) if request.args.get("limit") else None
+    except ValueError:
+        return jsonify({"error": "after and limit must be integers"}), 400
+    if after < 0 or (limit is not None and limit < 1):
+        return jsonify({"error": "after must be >= 0 and limit >= 1"}), 400
+
+    since = request.args.get("since") or None
+    until = request.args.get("until") or None
+    try:
+        for ts in (since, until):
+            if ts:
+                events.parse_timestamp(ts)
+    except ValueError:
+        return jsonify({"error": "since/until must be ISO timestamps"}), 400
+
+    rows = events.iter_events(
+        after=after,
+        competitor=request.args.get("competitor") or None,
+        since=since,
+        until=until,
+        category=request.args.get("type") or None,
+        limit=limit,
+        parse=(fmt == "csv"),
+    )
+
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    filename = f"changes.{'csv' if fmt == 'csv' else 'ndjson'}"
+    if gzip_out:
+        mimetype = "application/gzip"
+        filename += ".gz"
+
+    return Response(
+        stream_with_context(_export_chunks(rows, fmt, gzip_out)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+# --------------------------- API: Push Ingestion ---------------------------
+
+def _callback_base() -> str:
+    """Push callbacks are <base>/<token>; the token is stored with the subscription."""
+    base = (config.PUBLIC_BASE_URL or request.host_url).rstrip("/")
+    return f"{base}/api/ingest"
+
+@app.route("/api/subscriptions", methods=["GET"])
+def api_get_subscriptions():
+    return jsonify({"subscriptions": push.list_subscriptions(), "stats": push.push_stats()})
+
+@app.route("/api/subscriptions", methods=["POST"])
+def api_add_subscription():
+    data = request.get_json(force=True, silent=True) or {}
+    try:
+        comp = _find_competitor(int(data.get("competitor_id")))
+    except (TypeError, ValueError):
+        comp = None
+    if not comp:
+        return jsonify({"error": "Competitor not found"}), 404
+
+    mode = data.get("mode", "websub")
+    if mode == "github":
+        sub = push.register_github(comp["name"], _callback_base())
+        # secret shown once: paste it (and the callback) into the repo's webhook settings
+        return jsonify({"success": True, "subscription": sub})
+    if mode != "websub":
+        return jsonify({"error": "mode must be 'websub' or 'github'"}), 400
+
+    topic = (data.get("topic") or comp["changelog"]).strip()
+    if _is_nsfw_url(topic):
+        return jsonify({"error": "URL blocked by NSFW policy"}), 400
+    sub, err = push.subscribe_websub(comp["name"], topic, _callback_base(), hub=data.get("hub"))
+    if err:
+        return jsonify({"error": f"Subscribe failed: {err}"}), 502
+    return jsonify({"success": True, "subscription": {**sub, "secret": True}}), 202
+
+@app.route("/api/subscriptions/<int:competitor_id>", methods=["DELETE"])
+def api_delete_subscription(competitor_id: int):
+    comp = _find_competitor(competitor_id)
+    if not comp:
+        return jsonify({"error": "Competitor not found"}), 404
+    err = push.unsubscribe(comp["name"])
+    if err:
+        return jsonify({"error": err}), 404
+    return jsonify({"success": True})
+
+@app.route("/api/ingest/<token>", methods=["GET"])
+def api_ingest_verify(token: str):
+    """WebSub intent verification: echo hub.challenge for subscriptions we requested."""
+    # resolved via the subscription, not the competitor list: an unsubscribe is
+    # still verified after its competitor was deleted
+    name = push.find_by_token(token)
+    if not name:
+        abort(404)
+    challenge = push.verify_intent(
+        name,
+        request.args.get("hub.mode"),
+        request.args.get("hub.topic"),
+        request.args.get("hub.challenge"),
+        request.args.get("hub.lease_seconds"),
+    )
+    if challenge is None:
+        abort(404)
+    return Response(challenge, mimetype="text/plain")
+
+def _notify_push(name: str, diff: List[str]) -> None:
+    summary = summarize_all({name: diff})
+    if config.SLACK_WEBHOOK:
+        try:
+            send_slack(summary, config.SLACK_WEBHOOK)
+        except Exception as e:
+            print(f"[PUSH][ERROR] Slack failed: {e}")
+
+@app.route("/api/ingest/<token>", methods=["POST"])
+def api_ingest_push(token: str):
+    """Signed push delivery (WebSub content distribution or GitHub release webhook)."""
+    received_at = _utcnow()
+    name = push.find_by_token(token)
+    comp = next((c for c in MOCK_DATA["competitors"] if c["name"] == name), None) if name else None
+    sub = push.get_subscription(name) if comp else None
+    if not sub:
+        abort(404)
+
+    body = request.get_data()
+    if not push.verify_signature(sub, body, request.headers):
+        push.record_rejected()
+        # WebSub: ack but ignore bad signatures so the hub does not retry forever
+        return ("", 202) if sub["mode"] == "websub" else (jsonify({"error": "bad signature"}), 403)
+
+    if sub["mode"] == "github" and push.confirm_github(comp["name"], request.headers.get("X-GitHub-Event")):
+        print(f"[PUSH] GitHub webhook for {comp['name']} verified.")
+
+    lines, published = push.parse_delivery(sub, body, request.headers)
+    # own snapshot: pushed entries are never diffed against (or replaced by) the polled page
+    diff = ingest_lines(push.snapshot_key(comp["name"]), lines, merge=True) if lines else []
+    diff = unseen_lines(diff, comp["name"])  # already found by an earlier poll
+    latency = push.record_push(comp["name"], len(diff), published, received_at)
+
+    if diff:
+        print(f"[PUSH] {len(diff)} new line(s) for {comp['name']}.")
+        _cache_change_events({comp["name"]: diff}, "push")
+        comp["changesDetected"] = comp.get("changesDetected", 0) + len(diff)
+        comp["lastUpdate"] = _utcnow_iso()
+        # LLM + Slack off the request path so hubs get a fast 2xx
+        threading.Thread(target=_notify_push, args=(comp["name"], diff), daemon=True).start()
+
+    return jsonify({"success": True, "newLines": len(diff), "detectionLatencySec": latency}), 202
+
 # --------------------------- API: Run Monitor ------------------------------
 
 @app.route("/api/run-monitor", methods=["POST"])
@@ -383,19 +736,12 @@ def api_run_monitor():
         summary = "No new changes detected."
 
     # Cache change events for dashboard
-    for competitor_name, change_list in (changes or {}).items():
-        for line in change_list:
-            MOCK_DATA["recent_changes"].append(
-                _make_change_event(competitor_name, line, line, "manual")
-            )
+    _cache_change_events(changes, "manual")
 
     status["isRunning"] = False
     status["lastRun"] = _utcnow_iso()
     status["nextRun"] = (_utcnow() + timedelta(hours=1)).isoformat().replace("+00:00", "Z")
 
-    # prune
-    MOCK_DATA["recent_changes"] = MOCK_DATA["recent_changes"][-100:]
-
     return jsonify({
         "success": True,
         "summary": summary,
@@ -407,7 +753,11 @@ def api_run_monitor():
 
 @app.route("/api/status", methods=["GET"])
 def api_status():
-    return jsonify({"status": MOCK_DATA["monitoring_status"]})
+    return jsonify({
+        "status": MOCK_DATA["monitoring_status"],
+        "fetch": fetch_stats(),
+        "push": push.push_stats(),
+    })
 
 # --------------------------- API: Analytics --------------------------------
 
@@ -428,15 +778,13 @@ def api_analytics():
         comp_counts[c["competitor"]] = comp_counts.get(c["competitor"], 0) + 1
     competitor_activity = [{"competitor": k, "changes": v} for k, v in comp_counts.items()]
 
-    # naive type buckets by keyword in summary
-    def _count_kwd(k: str) -> int:
-        return sum(1 for c in MOCK_DATA["recent_changes"] if k in c["summary"].lower())
+    # type buckets from ingest-time classifier tags
+    type_counts: Dict[str, int] = {t: 0 for t in CHANGE_TYPES}
+    for c in MOCK_DATA["recent_changes"]:
+        category = c.get("category", "noise")
+        type_counts[category] = type_counts.get(category, 0) + 1
 
-    change_types = [
-        {"type": "feature", "count": _count_kwd("feature")},
-        {"type": "update",  "count": _count_kwd("update")},
-        {"type": "fix",     "count": _count_kwd("fix")},
-    ]
+    change_types = [{"type": t, "count": n} for t, n in type_counts.items()]
     total_type = sum(ct["count"] for ct in change_types) or 1
     for ct in change_types:
         ct["percentage"] = round(100 * ct["count"] / total_type, 1)
@@ -507,16 +855,19 @@ def run_monitoring_job():
         print("[SCHED] No changes detected.")
 
     # cache events
-    for competitor_name, change_list in (changes or {}).items():
-        for line in change_list:
-            MOCK_DATA["recent_changes"].append(
-                _make_change_event(competitor_name, line, line, "scheduled")
-            )
+    _cache_change_events(changes, "scheduled")
 
     status["isRunning"] = False
     status["lastRun"] = _utcnow_iso()
     status["nextRun"] = (_utcnow() + timedelta(hours=1)).isoformat().replace("+00:00", "Z")
-    MOCK_DATA["recent_changes"] = MOCK_DATA["recent_changes"][-100:]
+
+    # keep WebSub leases alive
+    try:
+        renewed = push.renew_expiring()
+        if renewed:
+            print(f"[SCHED] Renewed {renewed} WebSub subscription(s).")
+    except Exception as e:
+        print(f"[SCHED][ERROR] WebSub renewal failed: {e}")
 
 
 def background_monitor():
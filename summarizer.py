@@ -1,6 +1,8 @@
 import os
 from groq import Groq
 
+from classifier import classify, is_low_value
+
 # Defaults (override via env if you want)
 DEFAULT_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
 MAX_ITEMS_PER_COMP = int(os.getenv("SUMMARIZER_MAX_ITEMS", "50"))       # cap list size sent to LLM
@@ -38,6 +40,16 @@ def _prepare_prompt_text(changes: dict) -> str:
     return text
 
 
+def _triage(changes: dict) -> dict:
+    """Drop low-value lines (noise/docs per classifier) so they never reach the LLM."""
+    kept = {}
+    for name, items in changes.items():
+        useful = [it for it in items if not is_low_value(classify(it)[0])]
+        if useful:
+            kept[name] = useful
+    return kept
+
+
 def summarize_all(changes: dict,
                   model: str = DEFAULT_MODEL,
                   temperature: float = 0.2,
@@ -52,6 +64,14 @@ def summarize_all(changes: dict,
     if not api_key:
         return "[Groq Missing] " + _fallback_summary(changes)
 
+    triaged = _triage(changes)
+    if not triaged:
+        return "Only low-value changes (noise/docs) detected this run.\n" + _fallback_summary(changes)
+    skipped = sum(len(v) for v in changes.values()) - sum(len(v) for v in triaged.values())
+    if skipped:
+        print(f"[INFO] Classifier skipped {skipped} low-value line(s) before LLM.")
+    changes = triaged
+
     prompt_text = _prepare_prompt_text(changes)
 
     try:
@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Modules live flat at the repo root (python main.py / gunicorn server:app).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmark", action="store_true",
+                     help="also run timing tests marked @pytest.mark.benchmark")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: timing test, skipped unless --benchmark is given")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="timing test: run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+class StubServer:
+    """
+    Local HTTP server: `pages` maps path (incl. query) → body or (status, body).
+    POST bodies are recorded in `posts` as (path, body) and answered the same way.
+    """
+
+    def __init__(self):
+        self.pages = {}
+        self.hits = []
+        self.posts = []
+        self.delay = 0.0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with stub._lock:
+                    stub.posts.append((self.path, body.decode("utf-8")))
+                self.do_GET()
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.hits.append(self.path)
+                if stub.delay:
+                    time.sleep(stub.delay)
+                page = stub.pages.get(self.path, (404, "not found"))
+                status, body = page if isinstance(page, tuple) else (200, page)
+                if callable(body):
+                    body = body()
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def url(self, path):
+        return self.base + path
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    thread = threading.Thread(target=server.httpd.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+@pytest.fixture
+def fresh_fetch_cache():
+    import scraper
+    scraper.clear_fetch_cache()
+    yield
+    scraper.clear_fetch_cache()
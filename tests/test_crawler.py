@@ -0,0 +1,162 @@
+import uuid
+
+import pytest
+
+import config
+from crawler import crawl_competitor, entry_texts, merge_snapshot
+
+CHROME_TOP = ('<html><head>\n<meta name="csrf-token" content="{token}">\n'
+              '<script>window.__NONCE__ = "{token}";</script>\n</head><body>\n'
+              '<nav><a href="/">Home</a> <a href="/pricing">Pricing</a></nav>\n')
+CHROME_BOTTOM = '<footer>© 2024 Acme Inc. All rights reserved</footer>\n</body></html>'
+# body chrome outside <nav>/<footer> that the classifier does not call noise (GitHub releases)
+BODY_CHROME = ('<div class="flash">You signed in with another tab or window. '
+               '<a href="">Reload</a> to refresh your session.</div>\n'
+               '<summary>Choose a tag to compare</summary>\n')
+
+
+def _release(n):
+    return (f'<h2>v1.{n}.0</h2>\n'
+            f'<li>Added support for export format number {n} in the reports view</li>\n'
+            f'<li>Fixed a crash when opening dashboard number {n}</li>\n')
+
+
+class Changelog:
+    """Paginated release list served by the stub server, newest first, 3 per page."""
+
+    def __init__(self, server, releases, per_page=3, body_chrome=""):
+        self.server, self.releases, self.per_page = server, releases, per_page
+        self.body_chrome = body_chrome
+        for page in range(1, 12):
+            path = "/releases" if page == 1 else f"/releases?page={page}"
+            server.pages[path] = (200, self._render(page))
+
+    def _render(self, page):
+        def body():
+            newest_first = sorted(self.releases, reverse=True)
+            chunk = newest_first[(page - 1) * self.per_page:page * self.per_page]
+            # a fresh token per request: volatile lines must not defeat the early stop
+            return (CHROME_TOP.format(token=uuid.uuid4().hex) + self.body_chrome
+                    + "".join(_release(n) for n in chunk) + CHROME_BOTTOM)
+        return body
+
+
+@pytest.fixture
+def site(stub_server, fresh_fetch_cache, monkeypatch):
+    monkeypatch.setattr(config, "FETCH_CACHE_TTL", 0)
+    comp = {"name": "Stub", "changelog": stub_server.url("/releases"),
+            "sources": [{"url": stub_server.url("/releases"), "paginate": {"param": "page"}}]}
+    return comp, Changelog(stub_server, list(range(1, 10)))  # 9 releases → 3 full pages
+
+
+def _exports(lines):
+    return {n for n in range(1, 30)
+            if f"Added support for export format number {n} in the reports view" in entry_texts(lines)}
+
+
+def test_first_crawl_walks_until_an_empty_page(site, stub_server):
+    comp, _ = site
+    chrome = {}
+    lines, pages = crawl_competitor(comp, [], chrome=chrome)
+    assert pages == 4  # 3 pages of entries + the first page without any
+    assert sum("export format number" in l for l in lines) == 9
+    # chrome shared by every page is kept once
+    assert sum("All rights reserved" in l for l in lines) == 1
+    assert chrome == {comp["sources"][0]["url"]: []}  # nav/footer never count as entries
+
+
+def test_steady_state_is_one_request_despite_volatile_lines(site, stub_server):
+    comp, log = site
+    chrome = {}
+    snapshot, _ = crawl_competitor(comp, [], chrome=chrome)
+    stub_server.hits.clear()
+
+    lines, pages = crawl_competitor(comp, snapshot, chrome=chrome)
+    assert pages == 1 and stub_server.hits == ["/releases"]
+    new = set(lines) - set(snapshot)
+    assert all("csrf-token" in l or "__NONCE__" in l for l in new)  # only the volatile lines differ
+
+
+def test_new_entries_stop_at_first_known_entry(site, stub_server):
+    comp, log = site
+    chrome = {}
+    snapshot = merge_snapshot([], crawl_competitor(comp, [], chrome=chrome)[0])
+    log.releases += [10, 11, 12, 13]  # more than a page of new releases
+    stub_server.hits.clear()
+
+    lines, pages = crawl_competitor(comp, snapshot, chrome=chrome)
+    assert pages == 2
+    assert _exports(lines) - _exports(snapshot) == {10, 11, 12, 13}
+
+    merged = merge_snapshot(snapshot, lines)
+    assert sum("export format number" in l for l in merged) == 13  # deep pages kept
+    assert crawl_competitor(comp, merged, chrome=chrome)[1] == 1
+
+
+def test_body_chrome_does_not_stop_the_crawl(stub_server, fresh_fetch_cache, monkeypatch):
+    monkeypatch.setattr(config, "FETCH_CACHE_TTL", 0)
+    comp = {"name": "Stub", "changelog": stub_server.url("/releases"),
+            "sources": [{"url": stub_server.url("/releases"), "paginate": {"param": "page"}}]}
+    log = Changelog(stub_server, list(range(1, 10)), body_chrome=BODY_CHROME)
+    assert "Choose a tag to compare" in entry_texts(BODY_CHROME.splitlines())
+
+    # a snapshot from before chrome was learned: page one alone must not decide the stop
+    snapshot = crawl_competitor(comp, [])[0]
+    log.releases += list(range(10, 16))  # two pages of new releases
+    chrome = {}
+    lines, pages = crawl_competitor(comp, snapshot, chrome=chrome)
+    assert pages == 3 and _exports(lines) - _exports(snapshot) == set(range(10, 16))
+    assert chrome[comp["sources"][0]["url"]] == [
+        "Choose a tag to compare",
+        "You signed in with another tab or window. Reload to refresh your session."]
+
+    # learned chrome: steady state is one request, new entries are still all found
+    snapshot = merge_snapshot(snapshot, lines)
+    stub_server.hits.clear()
+    assert crawl_competitor(comp, snapshot, chrome=chrome)[1] == 1
+    log.releases += list(range(16, 22))
+    lines, pages = crawl_competitor(comp, snapshot, chrome=chrome)
+    assert pages == 3 and _exports(lines) - _exports(snapshot) == set(range(16, 22))
+
+
+def test_crawl_reports_failed_sources(stub_server, fresh_fetch_cache):
+    stub_server.pages["/changelog"] = "<li>Added dark mode to every dashboard</li>"
+    stub_server.pages["/feed"] = (503, "unavailable")
+    comp = {"name": "Stub", "changelog": stub_server.url("/changelog"),
+            "sources": [stub_server.url("/changelog"), stub_server.url("/feed")]}
+    failed = []
+    lines, _ = crawl_competitor(comp, [], failed=failed)
+    assert lines == ["<li>Added dark mode to every dashboard</li>"]
+    assert failed == [stub_server.url("/feed")]
+
+
+def test_merge_never_truncates_current_lines():
+    new = [f"<li>Added export format number {i}</li>" for i in range(10)]
+    old = [f"<li>Fixed a crash in dashboard number {i}</li>" for i in range(10)]
+    old += [new[3], old[1]]
+    assert merge_snapshot(old, new, limit=5) == new
+    assert merge_snapshot(old, new, limit=13) == new + old[:3]
+
+
+def test_merge_drops_old_markup_and_volatile_lines():
+    old = ['<meta name="csrf-token" content="abc">', "<script>", 'window.__NONCE__ = "abc";', "</script>",
+           "<li>Fixed a crash in dashboard number 1</li>", "<ul>"]
+    new = ['<meta name="csrf-token" content="def">', "<li>Added export format number 2</li>"]
+    assert merge_snapshot(old, new) == new + ["<li>Fixed a crash in dashboard number 1</li>"]
+
+
+def test_merge_with_filtered_tail_matches_full_merge():
+    runs = [['<meta name="csrf-token" content="t%d">' % r, "<ul>"]
+            + [f"<li>Added export format number {i}</li>" for i in range(r, r + 3)] for r in range(6)]
+    full, fast, tail = runs[0], runs[0], 0
+    for lines in runs[1:]:
+        full = merge_snapshot(full, lines, limit=7)
+        fast = merge_snapshot(fast, lines, limit=7, tail=tail)
+        tail = len(fast) - len(lines)
+        assert fast == full
+
+
+def test_entry_texts_ignore_markup_and_chrome():
+    page = (CHROME_TOP.format(token="abc") + _release(1) + CHROME_BOTTOM).splitlines()
+    assert entry_texts(page) == {"Added support for export format number 1 in the reports view",
+                                 "Fixed a crash when opening dashboard number 1"}
@@ -0,0 +1,34 @@
+import pytest
+
+import events
+
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    monkeypatch.setattr(events, "EVENTS_PATH", str(tmp_path / "data" / "events.jsonl"))
+    monkeypatch.setattr(events, "_state", {"path": None, "last_id": None, "size": 0, "index": None})
+    return events
+
+
+def _restart(log):
+    log._state.update(path=None, last_id=None, size=0, index=None)
+
+
+def test_ids_not_reused_after_delete_and_restart(log):
+    log.append_events([{"competitor": "Ackee", "timestamp": "2024-01-01T00:00:00Z"}])
+    log.append_events([{"competitor": "Cal.com", "timestamp": "2024-01-02T00:00:00Z"} for _ in range(3)])
+    assert log.delete_competitor_events("Cal.com") == 3
+
+    _restart(log)
+    (ev,) = log.append_events([{"competitor": "Ackee", "timestamp": "2024-01-03T00:00:00Z"}])
+    assert ev["id"] == 5
+    assert [i for i, _, _ in log.iter_events()] == [1, 5]
+
+
+def test_ids_not_reused_after_emptying_log(log):
+    log.append_events([{"competitor": "Ackee", "timestamp": "2024-01-01T00:00:00Z"} for _ in range(2)])
+    log.delete_competitor_events("Ackee")
+
+    _restart(log)
+    (ev,) = log.append_events([{"competitor": "Ackee", "timestamp": "2024-01-02T00:00:00Z"}])
+    assert ev["id"] == 3
@@ -0,0 +1,99 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+import events
+import server
+
+EVENTS = [
+    {"competitor": "Ackee", "timestamp": "2024-01-01T00:00:00Z", "type": "update", "category": "feature",
+     "score": 0.9, "summary": "Added CSV export", "changes": ["Added CSV export"]},
+    {"competitor": "Cal.com", "timestamp": "2024-01-02T00:00:00Z", "type": "update", "category": "pricing",
+     "score": 0.8, "summary": 'Pro plan, "Team" tier', "changes": ['Pro plan costs $19, "Team" tier\nnow $29']},
+    {"competitor": "Ackee", "timestamp": "2024-01-03T00:00:00Z", "type": "push", "category": "fix",
+     "score": 0.7, "summary": "Fixed a crash", "changes": ["Fixed a crash"]},
+    {"competitor": "Ackee", "timestamp": "2024-01-04T00:00:00Z", "type": "update", "category": "feature",
+     "score": 0.6, "summary": "Dark mode", "changes": ["Dark mode"]},
+]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(events, "EVENTS_PATH", str(tmp_path / "events.jsonl"))
+    monkeypatch.setattr(events, "_state", {"path": None, "last_id": None, "size": 0, "index": None})
+    events.append_events([dict(ev) for ev in EVENTS])
+    return server.app.test_client()
+
+
+def _ndjson(resp):
+    return [json.loads(line) for line in resp.data.decode().splitlines()]
+
+
+def test_ndjson_streams_every_event_in_id_order(client):
+    resp = client.get("/api/export")
+    assert resp.status_code == 200 and resp.mimetype == "application/x-ndjson"
+    assert "changes.ndjson" in resp.headers["Content-Disposition"]
+    rows = _ndjson(resp)
+    assert [r["id"] for r in rows] == [1, 2, 3, 4]
+    assert rows[1]["changes"] == EVENTS[1]["changes"]
+
+
+def test_gzip_csv_quotes_commas_quotes_and_newlines(client):
+    resp = client.get("/api/export?format=csv&compress=gzip")
+    assert resp.mimetype == "application/gzip"
+    assert "changes.csv.gz" in resp.headers["Content-Disposition"]
+    rows = list(csv.reader(io.StringIO(gzip.decompress(resp.data).decode())))
+    assert rows[0] == server.EXPORT_CSV_FIELDS
+    assert len(rows) == 5
+    assert rows[2] == ["2", "2024-01-02T00:00:00Z", "Cal.com", "update", "pricing", "0.8",
+                       'Pro plan, "Team" tier', 'Pro plan costs $19, "Team" tier\nnow $29']
+
+
+@pytest.mark.parametrize("query, ids", [
+    ("competitor=Ackee", [1, 3, 4]),
+    ("type=feature", [1, 4]),
+    ("since=2024-01-02T00:00:00Z", [2, 3, 4]),
+    ("until=2024-01-03", [1, 2]),
+    ("competitor=Ackee&type=feature&since=2024-01-02&until=2024-01-05", [4]),
+])
+def test_filters(client, query, ids):
+    assert [r["id"] for r in _ndjson(client.get(f"/api/export?{query}"))] == ids
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_resume_after_cursor_with_limit(client, fmt):
+    seen, after = [], 0
+    while True:
+        resp = client.get(f"/api/export?format={fmt}&after={after}&limit=3")
+        if fmt == "csv":
+            ids = [int(r[0]) for r in list(csv.reader(io.StringIO(resp.data.decode())))[1:]]
+        else:
+            ids = [r["id"] for r in _ndjson(resp)]
+        if not ids:
+            break
+        assert len(ids) <= 3
+        seen += ids
+        after = ids[-1]
+    assert seen == [1, 2, 3, 4]
+
+
+def test_resume_with_filter_skips_to_cursor(client):
+    assert [r["id"] for r in _ndjson(client.get("/api/export?competitor=Ackee&after=1&limit=1"))] == [3]
+
+
+@pytest.mark.parametrize("query", ["format=xml", "after=abc", "limit=ten", "after=-1", "limit=0",
+                                   "since=yesterday", "until=2024-13-01"])
+def test_bad_parameters_are_400(client, query):
+    resp = client.get(f"/api/export?{query}")
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
+
+
+def test_resume_across_index_checkpoints(client, monkeypatch):
+    monkeypatch.setattr(events, "INDEX_EVERY", 2)
+    events.append_events([dict(EVENTS[0]) for _ in range(6)])
+    events._state["index"] = None
+    assert [r["id"] for r in _ndjson(client.get("/api/export?after=5&limit=3"))] == [6, 7, 8]
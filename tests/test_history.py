@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+import config
+import history
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_DIR", str(tmp_path / "history"))
+    monkeypatch.setattr(config, "HISTORY_KEYFRAME_EVERY", 7)
+    history._index.clear()
+    yield history
+    history._index.clear()
+
+
+def _random_versions(n, seed=7):
+    """Page versions with inserts, removals, edits, reverts to older content and repeats."""
+    rng = random.Random(seed)
+    page = [f"line {i}" for i in range(40)]
+    versions = []
+    for step in range(n):
+        roll = rng.random()
+        if versions and roll < 0.1:
+            page = list(rng.choice(versions))        # revert → "same" ref
+        elif versions and roll < 0.2:
+            page = list(versions[-1])                # consecutive duplicate → nothing stored
+        else:
+            page = list(page)
+            for _ in range(rng.randint(1, 4)):
+                op, pos = rng.random(), rng.randrange(len(page) + 1)
+                if op < 0.4:
+                    page.insert(pos, f"added {step}.{pos}")
+                elif op < 0.7 and len(page) > 5:
+                    page.pop(min(pos, len(page) - 1))
+                else:
+                    page[min(pos, len(page) - 1)] = f"edited {step}.{pos}"
+        versions.append(page)
+    return versions
+
+
+def _record_all(store, versions):
+    stored = []  # distinct consecutive contents, in version order
+    for i, page in enumerate(versions):
+        v = store.record_version("Stub", page, timestamp=f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}Z")
+        if not stored or stored[-1] != page:
+            stored.append(page)
+        assert v == len(stored) - 1
+    return stored
+
+
+def test_random_round_trip(store):
+    stored = _record_all(store, _random_versions(300))
+    metas = store.list_versions("Stub")
+    assert len(metas) == len(stored) < 300
+    assert {m["kind"] for m in metas} == {"full", "delta", "same"}
+
+    for v, page in enumerate(stored):
+        assert store.get_version("Stub", v) == page
+    assert [lines for _, lines in store.iter_versions("Stub")] == stored
+    assert [lines for _, lines in store.iter_versions("Stub", 101, 150)] == stored[101:150]
+
+    store._index.clear()  # rebuilt from the log on disk
+    assert [store.get_version("Stub", v) for v in range(len(stored))] == stored
+
+
+def test_keyframe_cadence(store):
+    _record_all(store, [[f"v{i}", "shared"] for i in range(30)])
+    kinds = [m["kind"] for m in store.list_versions("Stub")]
+    fulls = [v for v, kind in enumerate(kinds) if kind == "full"]
+    assert fulls == [0, 7, 14, 21, 28]
+    assert all(kind == "delta" for v, kind in enumerate(kinds) if v not in fulls)
+
+
+def test_duplicates_and_reverts(store):
+    assert store.record_version("Stub", ["a"]) == 0
+    assert store.record_version("Stub", ["a"]) == 0          # consecutive duplicate: not stored
+    assert store.record_version("Stub", ["a", "b"]) == 1
+    assert store.record_version("Stub", ["a"]) == 2          # revert: stored as a reference
+    metas = store.list_versions("Stub")
+    assert [m["kind"] for m in metas] == ["full", "delta", "same"]
+    assert store._index["Stub"]["entries"][2]["ref"] == 0
+    assert store.record_version("Stub", ["a", "c"]) == 3      # delta on top of a "same" entry
+    assert store.get_version("Stub", 3) == ["a", "c"]
+    assert store.get_version("Stub", 4) is None
+
+
+def test_version_at_and_diff(store):
+    store.record_version("Stub", ["a"], timestamp="2024-01-01T00:00:00Z")
+    store.record_version("Stub", ["a", "b"], timestamp="2024-02-01T00:00:00Z")
+    assert store.version_at("Stub", "2023-12-31T00:00:00Z") is None
+    assert store.version_at("Stub", "2024-01-15T00:00:00+00:00") == 0
+    assert store.version_at("Stub", "2024-03-01T00:00:00Z") == 1
+    assert store.diff_versions("Stub", 0, 1) == {"added": ["b"], "removed": []}
+    assert store.diff_versions("Stub", None, 0) == {"added": ["a"], "removed": []}
+
+
+def test_delete_history(store):
+    store.record_version("Stub", ["a"])
+    assert store.delete_history("Stub") is True
+    assert store.list_versions("Stub") == []
+    assert store.delete_history("Stub") is False
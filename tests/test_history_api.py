@@ -0,0 +1,64 @@
+import pytest
+
+import history
+import server
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_DIR", str(tmp_path / "history"))
+    history._index.clear()
+    comp = server.MOCK_DATA["competitors"][0]
+    history.record_version(comp["name"], ["v1 released"], timestamp="2024-01-01T00:00:00Z")
+    history.record_version(comp["name"], ["v2 released", "v1 released"], timestamp="2024-02-01T00:00:00Z")
+    yield server.app.test_client(), comp["id"]
+    history._index.clear()
+
+
+def test_diff_between_timestamps(client):
+    app, cid = client
+    resp = app.get(f"/api/competitors/{cid}/diff?from=2024-01-15T00:00:00Z&to=2024-02-15")
+    assert resp.status_code == 200
+    assert resp.get_json()["added"] == ["v2 released"]
+
+
+@pytest.mark.parametrize("query", ["from=garbage", "to=yesterday", "from=2024-13-01"])
+def test_diff_rejects_malformed_timestamps(client, query):
+    app, cid = client
+    resp = app.get(f"/api/competitors/{cid}/diff?{query}")
+    assert resp.status_code == 400
+
+
+def test_diff_rejects_from_after_to(client):
+    app, cid = client
+    resp = app.get(f"/api/competitors/{cid}/diff?from=2024-03-01T00:00:00Z&to=2024-01-01T00:00:00Z")
+    assert resp.status_code == 400
+
+
+def test_snapshot_at(client):
+    app, cid = client
+    assert app.get(f"/api/competitors/{cid}/snapshot?at=2024-01-02").get_json()["lines"] == ["v1 released"]
+    assert app.get(f"/api/competitors/{cid}/snapshot?at=not-a-date").status_code == 400
+
+
+def test_snapshot_by_version(client):
+    app, cid = client
+    resp = app.get(f"/api/competitors/{cid}/snapshot?v=1")
+    assert resp.status_code == 200
+    assert resp.get_json()["version"] == 1
+    assert resp.get_json()["lines"] == ["v2 released", "v1 released"]
+    assert app.get(f"/api/competitors/{cid}/snapshot?v=0").get_json()["lines"] == ["v1 released"]
+
+
+@pytest.mark.parametrize("v, status", [("two", 400), ("1.5", 400), ("2", 404), ("-1", 404)])
+def test_snapshot_rejects_bad_versions(client, v, status):
+    app, cid = client
+    assert app.get(f"/api/competitors/{cid}/snapshot?v={v}").status_code == status
+
+
+def test_history_lists_versions(client):
+    app, cid = client
+    body = app.get(f"/api/competitors/{cid}/history").get_json()
+    assert [(m["v"], m["ts"], m["kind"]) for m in body["versions"]] == [
+        (0, "2024-01-01T00:00:00Z", "full"), (1, "2024-02-01T00:00:00Z", "delta")]
+    assert app.get("/api/competitors/999/history").status_code == 404
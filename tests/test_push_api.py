@@ -0,0 +1,236 @@
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import config
+import events
+import history
+import main
+import push
+import server
+
+COMPETITORS = [
+    {"name": "Plausible", "changelog": "https://plausible.io/changelog"},
+    {"name": "Ackee", "changelog": "https://github.com/electerious/Ackee/releases"},
+    {"name": "Cal.com", "changelog": "https://cal.com/changelog"},
+]
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(server, "DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(push, "SUBSCRIPTIONS_PATH", str(tmp_path / "data" / "subscriptions.json"))
+    monkeypatch.setattr(history, "HISTORY_DIR", str(tmp_path / "data" / "history"))
+    monkeypatch.setattr(events, "EVENTS_PATH", str(tmp_path / "data" / "events.jsonl"))
+    monkeypatch.setattr(config, "PUBLIC_BASE_URL", "")
+    monkeypatch.setattr(config, "SLACK_WEBHOOK", "")
+    monkeypatch.setattr(config, "COMPETITORS", [dict(c) for c in COMPETITORS])
+    monkeypatch.setitem(server.MOCK_DATA, "competitors",
+                        [{"id": i, **c} for i, c in enumerate(COMPETITORS, start=1)])
+    monkeypatch.setitem(server.MOCK_DATA, "recent_changes", [])
+    monkeypatch.setattr(server, "_notify_push", lambda name, diff: None)
+    monkeypatch.setattr(push, "_stats", dict.fromkeys(push._stats, 0))
+    monkeypatch.setattr(config, "ARCHIVE_RAW_PAGES", False)
+    monkeypatch.setattr(config, "FETCH_CACHE_TTL", 0)
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    history._index.clear()
+    yield server.app.test_client()
+    history._index.clear()
+
+
+def _callback_path(sub):
+    return urlparse(sub["callback"]).path
+
+
+def _websub(app, stub_server, competitor_id=2, topic="https://example.com/feed.atom"):
+    """Subscribe through the stub hub and answer its intent check; returns the subscription."""
+    stub_server.pages["/hub"] = (202, "")
+    app.post("/api/subscriptions", json={"competitor_id": competitor_id, "topic": topic,
+                                         "hub": stub_server.url("/hub")})
+    name = server.MOCK_DATA["competitors"][competitor_id - 1]["name"]
+    sub = push.get_subscription(name)
+    app.get(_callback_path(sub), query_string={"hub.mode": "subscribe", "hub.topic": topic,
+                                               "hub.challenge": "ok", "hub.lease_seconds": "86400"})
+    return push.get_subscription(name)
+
+
+def _feed_headers(sub, body):
+    return {"X-Hub-Signature": "sha1=" + hmac.new(sub["secret"].encode(), body, hashlib.sha1).hexdigest()}
+
+
+def _signed(sub, payload):
+    body = json.dumps(payload).encode()
+    sig = hmac.new(sub["secret"].encode(), body, hashlib.sha256).hexdigest()
+    return body, {"X-Hub-Signature-256": f"sha256={sig}", "X-GitHub-Event": "release"}
+
+
+def test_github_callback_survives_renumbering(app):
+    sub = app.post("/api/subscriptions", json={"competitor_id": 2, "mode": "github"}).get_json()["subscription"]
+    assert app.delete("/api/competitors/1").status_code == 200  # Ackee is now id 1, Cal.com id 2
+
+    body, headers = _signed(sub, {"action": "published", "release": {"name": "v3.0 adds dark mode"}})
+    resp = app.post(_callback_path(sub), data=body, headers=headers)
+    assert resp.status_code == 202
+    assert resp.get_json()["newLines"] == 1
+    assert [c["competitor"] for c in server.MOCK_DATA["recent_changes"]] == ["Ackee"]
+
+
+def test_callback_survives_rename(app):
+    sub = app.post("/api/subscriptions", json={"competitor_id": 2, "mode": "github"}).get_json()["subscription"]
+    app.put("/api/competitors/2", json={"name": "Ackee Analytics"})
+
+    body, headers = _signed(sub, {"action": "published", "release": {"name": "v3.1 adds exports"}})
+    assert app.post(_callback_path(sub), data=body, headers=headers).status_code == 202
+    assert server.MOCK_DATA["recent_changes"][-1]["competitor"] == "Ackee Analytics"
+
+
+def test_unknown_token_is_404(app):
+    assert app.post("/api/ingest/not-a-token", data=b"{}").status_code == 404
+    assert app.get("/api/ingest/2?hub.mode=subscribe&hub.challenge=x").status_code == 404
+
+
+def test_websub_unsubscribe_verified_after_delete(app, stub_server):
+    stub_server.pages["/hub"] = (202, "")
+    topic = "https://github.com/electerious/Ackee/releases.atom"
+    resp = app.post("/api/subscriptions", json={"competitor_id": 2, "topic": topic,
+                                                "hub": stub_server.url("/hub")})
+    assert resp.status_code == 202
+    sub = push.get_subscription("Ackee")
+    form = parse_qs(stub_server.posts[-1][1])
+    assert form["hub.callback"] == [sub["callback"]]
+
+    path = _callback_path(sub)
+    verify = app.get(path, query_string={"hub.mode": "subscribe", "hub.topic": topic,
+                                         "hub.challenge": "c1", "hub.lease_seconds": "3600"})
+    assert verify.data == b"c1"
+
+    app.delete("/api/competitors/1")
+    app.delete("/api/competitors/1")  # Ackee, after renumbering
+    assert push.get_subscription("Ackee")["state"] == "unsubscribing"
+    assert parse_qs(stub_server.posts[-1][1])["hub.mode"] == ["unsubscribe"]
+
+    verify = app.get(path, query_string={"hub.mode": "unsubscribe", "hub.topic": topic,
+                                         "hub.challenge": "c2"})
+    assert verify.data == b"c2"
+    assert push.get_subscription("Ackee") is None
+
+
+ATOM = """<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>Ackee releases</title>
+  <entry>
+    <title>v3.1.0</title>
+    <updated>2024-05-02T10:00:00Z</updated>
+    <content type="html">&lt;p&gt;Added &lt;b&gt;CSV export&lt;/b&gt; for events&lt;/p&gt;&lt;ul&gt;&lt;li&gt;Fixed a crash on startup&lt;/li&gt;&lt;/ul&gt;</content>
+  </entry>
+  <entry>
+    <title>v3.0.0</title>
+    <updated>2024-04-01T10:00:00Z</updated>
+    <summary>Dark mode is now available</summary>
+  </entry>
+</feed>
+"""
+
+
+def test_parse_delivery_reads_feed_entries():
+    lines, published = push.parse_delivery({"mode": "websub"}, ATOM.encode(), {})
+    assert lines == ["v3.1.0", "Added CSV export for events", "Fixed a crash on startup",
+                     "v3.0.0", "Dark mode is now available"]
+    assert published.isoformat() == "2024-05-02T10:00:00+00:00"
+
+
+def test_pushed_entries_survive_safety_poll(app, stub_server):
+    stub_server.pages["/hub"] = (202, "")
+    app.post("/api/subscriptions", json={"competitor_id": 2, "topic": "https://example.com/feed.atom",
+                                         "hub": stub_server.url("/hub")})
+    sub = push.get_subscription("Ackee")
+    body = ATOM.encode()
+    headers = {"X-Hub-Signature": "sha1=" + hmac.new(sub["secret"].encode(), body, hashlib.sha1).hexdigest()}
+
+    assert app.post(_callback_path(sub), data=body, headers=headers).get_json()["newLines"] == 5
+    main.ingest_lines("Ackee", ["<html>", "<h1>Ackee releases</h1>", "</html>"])  # safety poll
+    assert app.post(_callback_path(sub), data=body, headers=headers).get_json()["newLines"] == 0
+    assert main.load_snapshot("Ackee") == ["<html>", "<h1>Ackee releases</h1>", "</html>"]
+
+
+def test_github_subscription_pending_until_signed_ping(app):
+    sub = app.post("/api/subscriptions", json={"competitor_id": 2, "mode": "github"}).get_json()["subscription"]
+    assert sub["state"] == "pending"
+    assert not push.is_subscribed("Ackee")
+
+    body, headers = _signed(sub, {"zen": "Keep it logically awesome.", "hook_id": 1})
+    headers["X-GitHub-Event"] = "ping"
+    bad = dict(headers, **{"X-Hub-Signature-256": "sha256=" + "0" * 64})
+    assert app.post(_callback_path(sub), data=body, headers=bad).status_code == 403
+    assert push.get_subscription("Ackee")["state"] == "pending"
+
+    resp = app.post(_callback_path(sub), data=body, headers=headers)
+    assert resp.status_code == 202 and resp.get_json()["newLines"] == 0
+    assert push.get_subscription("Ackee")["state"] == "verified"
+    assert push.is_subscribed("Ackee")
+
+
+def test_safety_poll_does_not_repeat_pushed_entries(app, stub_server, fresh_fetch_cache, monkeypatch):
+    monkeypatch.setattr(config, "COMPETITORS", [{"name": "Ackee", "changelog": stub_server.url("/releases")}])
+    sub = _websub(app, stub_server)
+    assert app.post(_callback_path(sub), data=ATOM.encode(),
+                    headers=_feed_headers(sub, ATOM.encode())).get_json()["newLines"] == 5
+
+    stub_server.pages["/releases"] = ("<li>Added <b>CSV export</b> for events</li>\n"
+                                      "<li>Fixed a crash on startup</li>\n"
+                                      "<li>Dark mode is now available</li>\n"
+                                      "<li>Added SAML single sign-on for teams</li>")
+    assert push.poll_due("Ackee")
+    changes = main.run(return_changes=True)
+    assert changes == {"Ackee": ["<li>Added SAML single sign-on for teams</li>"]}
+
+
+def _iso(dt):
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def test_push_replaces_polling_until_safety_poll_is_due(app, stub_server, fresh_fetch_cache, monkeypatch):
+    monkeypatch.setattr(config, "COMPETITORS", [{"name": "Ackee", "changelog": stub_server.url("/releases")}])
+    stub_server.pages["/releases"] = "<li>Added SAML single sign-on for teams</li>"
+    sub = _websub(app, stub_server)
+    assert push.is_subscribed("Ackee")
+
+    main.run()  # never polled: the safety poll is due at once
+    main.run()
+    main.run()
+    assert stub_server.hits.count("/releases") == 1
+
+    published = datetime.now(timezone.utc) - timedelta(seconds=90)
+    feed = ATOM.replace("2024-05-02T10:00:00Z", _iso(published)).encode()
+    resp = app.post(_callback_path(sub), data=feed, headers=_feed_headers(sub, feed)).get_json()
+    assert 90 <= resp["detectionLatencySec"] < 120
+
+    stats = app.get("/api/status").get_json()["push"]
+    assert stats["fetchesAvoided"] == 2
+    assert stats["received"] == 1 and stats["subscriptions"] == 1
+    assert 90 <= stats["avgDetectionLatencySec"] < 120
+
+    push._update("Ackee", lastPoll=_iso(datetime.now(timezone.utc)
+                                        - timedelta(hours=config.PUSH_SAFETY_POLL_HOURS, minutes=1)))
+    main.run()
+    assert stub_server.hits.count("/releases") == 2
+
+
+def test_renew_expiring_resubscribes_at_the_hub(app, stub_server):
+    sub = _websub(app, stub_server)
+    assert push.renew_expiring(within_hours=1) == 0  # 24h lease: not due yet
+
+    push._update("Ackee", expiresAt=_iso(datetime.now(timezone.utc) + timedelta(minutes=30)))
+    stub_server.posts.clear()
+    assert push.renew_expiring(within_hours=1) == 1
+    form = parse_qs(stub_server.posts[-1][1])
+    assert form["hub.mode"] == ["subscribe"]
+    assert form["hub.callback"] == [sub["callback"]] and form["hub.secret"] == [sub["secret"]]
+
+    stub_server.pages["/hub"] = (500, "hub down")
+    assert push.renew_expiring(within_hours=1) == 0
@@ -0,0 +1,168 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import config
+import history
+import replay
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(replay, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(replay, "REPLAY_DIR", str(tmp_path / "replay"))
+    comp = {"name": "Stub", "changelog": "https://example.test/releases",
+            "sources": [{"url": "https://example.test/releases", "paginate": {"param": "page"}}]}
+    monkeypatch.setattr(config, "COMPETITORS", [comp])
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def add_run(hour, *pages):
+        replay.archive_run("Stub", [(0, i, "\n".join(p)) for i, p in enumerate(pages)],
+                           when=start + timedelta(hours=hour))
+    return add_run
+
+
+def _events(competitor=None):
+    with open(os.path.join(replay.REPLAY_DIR, "events.jsonl")) as f:
+        rows = [json.loads(line) for line in f]
+    return [r["changes"][0] for r in rows if competitor in (None, r["competitor"])]
+
+
+def _checkpoint():
+    with open(os.path.join(replay.REPLAY_DIR, "checkpoint.json")) as f:
+        return json.load(f)
+
+
+def _release_runs(add_run, start, stop):
+    """Paginated runs: every third run re-crawls page two, the others stop after page one."""
+    for hour in range(start, stop):
+        page1 = ["nav", f"Added feature number {hour}", f"Fixed bug number {hour - 1}"]
+        page2 = ["nav", f"Added feature number {hour - 2}", "Fixed typo in README"]
+        add_run(hour, page1, page2) if hour % 3 == 0 else add_run(hour, page1)
+
+
+def test_shallow_runs_do_not_reemit_deep_entries(archive):
+    archive(0, ["nav", "Added export to CSV", "Fixed login crash"],
+               ["nav", "Added dark mode", "Fixed typo in README"])
+    archive(1, ["nav", "Added export to CSV", "Fixed login crash"])  # stopped after page 1
+    archive(2, ["nav", "New billing page", "Added export to CSV"],
+               ["nav", "Fixed login crash", "Added dark mode"])  # deep again
+
+    stats = replay.replay(workers=1, dry_run=True, batch_size=1)
+
+    assert stats["pages"] == 3
+    assert _events() == ["nav", "Added export to CSV", "Fixed login crash",
+                         "Added dark mode", "Fixed typo in README", "New billing page"]
+
+
+def test_legacy_single_file_runs_still_replay(archive, monkeypatch):
+    monkeypatch.setattr(config, "COMPETITORS", [{"name": "Stub", "changelog": "https://example.test"}])
+    folder = os.path.join(replay.ARCHIVE_DIR, "Stub")
+    os.makedirs(folder)
+    for stamp, text in (("20240101T000000000000Z", "a\nb"), ("20240102T000000000000Z", "a\nb\nc")):
+        with open(os.path.join(folder, stamp + ".html"), "w") as f:
+            f.write(text)
+
+    replay.replay(workers=1, dry_run=True)
+    assert _events() == ["a", "b", "c"]
+
+
+def test_merged_competitor_is_chunked_and_matches_single_batch(archive):
+    _release_runs(archive, 0, 12)
+    replay.replay(workers=1, dry_run=True, batch_size=100)
+    expected = _events()
+
+    replay.replay(workers=2, dry_run=True, batch_size=2)
+    assert _events() == expected
+    assert len(_checkpoint()["merged"]["Stub"]) > 0
+
+
+def test_resume_picks_up_runs_archived_after_the_checkpoint(archive):
+    _release_runs(archive, 0, 12)
+    replay.replay(workers=1, dry_run=True, batch_size=100)
+    expected = _events()
+
+    later = os.path.join(os.path.dirname(replay.ARCHIVE_DIR), "later")
+    os.makedirs(later)
+    runs = replay._archive_runs("Stub")
+    for folder in runs[5:]:
+        os.rename(folder, os.path.join(later, os.path.basename(folder)))  # not archived yet
+    replay.replay(workers=1, dry_run=True, batch_size=4)
+    assert _checkpoint()["done"]["Stub"] == os.path.basename(runs[4])
+
+    for folder in runs[5:]:
+        os.rename(os.path.join(later, os.path.basename(folder)), folder)
+    stats = replay.replay(workers=2, dry_run=True, batch_size=3, resume=True)  # other batch size
+    assert stats["pages"] == 7
+    assert _events() == expected
+
+
+def test_resume_with_another_source_is_refused(archive):
+    _release_runs(archive, 0, 3)
+    replay.replay(workers=1, dry_run=True)
+    with pytest.raises(ValueError):
+        replay.replay(source="history", workers=1, dry_run=True, resume=True)
+
+
+def test_order_per_competitor_is_kept_across_workers(archive, monkeypatch):
+    comps = [{"name": "Stub", "changelog": "https://example.test/releases",
+              "sources": [{"url": "https://example.test/releases", "paginate": {"param": "page"}}]},
+             {"name": "Plain", "changelog": "https://example.test/changelog"}]
+    monkeypatch.setattr(config, "COMPETITORS", comps)
+    _release_runs(archive, 0, 9)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for hour in range(9):
+        replay.archive_run("Plain", [(0, 0, "\n".join(f"Added option {n}" for n in range(hour + 1)))],
+                           when=start + timedelta(hours=hour))
+
+    replay.replay(workers=1, dry_run=True, batch_size=100)
+    expected = {name: _events(name) for name in ("Stub", "Plain")}
+    replay.replay(workers=3, dry_run=True, batch_size=1)
+    assert {name: _events(name) for name in ("Stub", "Plain")} == expected
+    assert expected["Plain"] == [f"Added option {n}" for n in range(9)]
+
+
+def test_history_source(archive, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_DIR", os.path.join(os.path.dirname(replay.ARCHIVE_DIR), "history"))
+    history._index.clear()
+    for i, lines in enumerate((["a"], ["a", "b"], ["a", "b"], ["c", "a", "b"], ["c"])):
+        history.record_version("Stub", lines, timestamp=f"2024-01-0{i + 1}T00:00:00Z")
+
+    stats = replay.replay(source="history", workers=2, dry_run=True, batch_size=2)
+    assert stats["pages"] == 4  # the duplicate version is never recorded
+    assert _events() == ["a", "b", "c"]
+    assert _checkpoint()["done"] == {"Stub": 3}
+
+    history.record_version("Stub", ["c", "d"], timestamp="2024-01-09T00:00:00Z")
+    assert replay.replay(source="history", workers=1, dry_run=True, resume=True)["pages"] == 1
+    assert _events() == ["a", "b", "c", "d"]
+    history._index.clear()
+
+
+def test_cli_replays_archive_and_rejects_mismatched_resume(tmp_path):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for hour, lines in enumerate((["Added export"], ["Added export", "Added dark mode"])):
+        folder = tmp_path / "data" / "archive" / "Plausible_Analytics" / (
+            (start + timedelta(hours=hour)).strftime("%Y%m%dT%H%M%S%fZ"))
+        folder.mkdir(parents=True)
+        (folder / "000-000.html").write_text("\n".join(lines))
+
+    def cli(*args):
+        env = dict(os.environ, GROQ_API_KEY="", SLACK_WEBHOOK="")
+        return subprocess.run([sys.executable, os.path.join(ROOT, "main.py"), "replay", *args],
+                              cwd=tmp_path, env=env, capture_output=True, text=True, timeout=120)
+
+    done = cli("--dry-run", "--workers", "2")
+    assert done.returncode == 0, done.stderr
+    assert "[REPLAY] Done: 2 page(s), 2 event(s)" in done.stdout
+    rows = (tmp_path / "data" / "replay" / "events.jsonl").read_text().splitlines()
+    assert [json.loads(r)["competitor"] for r in rows] == ["Plausible Analytics"] * 2
+
+    refused = cli("--dry-run", "--resume", "--source", "history")
+    assert refused.returncode != 0 and "run without --resume" in refused.stderr
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import config
+import scraper
+from scraper import fetch_changelog
+
+
+def _concurrent_fetch(url, n):
+    barrier = threading.Barrier(n)
+    results, stats = [None] * n, [dict() for _ in range(n)]
+
+    def worker(i):
+        barrier.wait()
+        results[i] = fetch_changelog(url, stats=stats[i])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    totals = {}
+    for s in stats:
+        for k, v in s.items():
+            totals[k] = totals.get(k, 0) + v
+    return results, totals
+
+
+def test_concurrent_triggers_share_one_upstream_fetch(stub_server, fresh_fetch_cache):
+    stub_server.pages["/changelog"] = "<h2>v2.0</h2>\nNew: dark mode"
+    stub_server.delay = 0.3  # keep the first request in flight while the others arrive
+
+    results, totals = _concurrent_fetch(stub_server.url("/changelog"), 8)
+
+    assert stub_server.hits == ["/changelog"]
+    assert set(results) == {"<h2>v2.0</h2>\nNew: dark mode"}
+    assert totals.get("fetches") == 1
+    assert totals.get("fetches", 0) + totals.get("shared", 0) + totals.get("cached", 0) == 8
+
+
+def test_cached_within_ttl_and_refetched_after(stub_server, fresh_fetch_cache, monkeypatch):
+    stub_server.pages["/changelog"] = "v1"
+    url = stub_server.url("/changelog")
+    stats = {}
+
+    assert fetch_changelog(url, stats=stats) == "v1"
+    stub_server.pages["/changelog"] = "v2"
+    assert fetch_changelog(url, stats=stats) == "v1"
+    assert stats == {"fetches": 1, "cached": 1}
+
+    monkeypatch.setattr(config, "FETCH_CACHE_TTL", 0)
+    assert fetch_changelog(url, stats=stats) == "v2"
+    assert len(stub_server.hits) == 2
+
+
+def test_failures_are_shared_but_not_cached(stub_server, fresh_fetch_cache):
+    stub_server.pages["/changelog"] = (500, "boom")
+    stub_server.delay = 0.3
+    url = stub_server.url("/changelog")
+
+    results, totals = _concurrent_fetch(url, 4)
+    assert results == [None] * 4
+    assert len(stub_server.hits) == 1
+
+    stub_server.delay = 0.0
+    stub_server.pages["/changelog"] = "ok"
+    assert fetch_changelog(url) == "ok"
+    assert len(stub_server.hits) == 2
+
+
+def test_fetch_stats_report_duplicates_avoided(stub_server, fresh_fetch_cache):
+    stub_server.pages["/changelog"] = "v1"
+    before = scraper.fetch_stats()
+    url = stub_server.url("/changelog")
+    fetch_changelog(url)
+    fetch_changelog(url)
+    after = scraper.fetch_stats()
+    assert after["fetches"] - before["fetches"] == 1
+    assert after["duplicatesAvoided"] - before["duplicatesAvoided"] == 1
+
+
+def test_cache_drops_expired_pages_and_is_capped(stub_server, fresh_fetch_cache, monkeypatch):
+    monkeypatch.setattr(config, "FETCH_CACHE_TTL", 300)
+    monkeypatch.setattr(scraper, "_CACHE_MAX", 3)
+    urls = [stub_server.url(f"/p{i}") for i in range(5)]
+    for i, url in enumerate(urls):
+        stub_server.pages[f"/p{i}"] = f"page {i}"
+        fetch_changelog(url)
+    assert list(scraper._cache) == urls[2:]  # oldest dropped first
+
+    started = time.monotonic()
+    monkeypatch.setattr(scraper.time, "monotonic", lambda: started + 300)
+    assert fetch_changelog(urls[4]) == "page 4"  # expired: fetched again
+    assert list(scraper._cache) == [urls[4]]
+    assert stub_server.hits.count("/p4") == 2